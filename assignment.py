@@ -0,0 +1,336 @@
+import numpy as np  # Operaciones vectorizadas sobre la matriz de costos.
+from collections import deque  # Cola de la búsqueda de cadenas de expulsión.
+from sparse_costs import SparseCosts  # Instalaciones permitidas de cada cliente con costos dispersos.
+
+# Tolerancia para comparar flujos y capacidades.
+EPSILON = 1e-9
+
+
+def transport_flows(problem, open_mask):
+    """
+    Resuelve el problema de transporte para un conjunto fijo de instalaciones abiertas.
+
+    Cada cliente puede repartir su demanda entre varias instalaciones, por lo que el
+    resultado es el costo mínimo de asignación (una cota inferior de la asignación
+    de fuente única). Se usa camino más corto sucesivo: primero se envía la demanda
+    de cada cliente a su instalación más barata mientras haya capacidad, y el resto
+    se aumenta con Bellman-Ford sobre las instalaciones.
+
+    Args:
+        problem (CFLP): Instancia del problema.
+        open_mask (array): Estado de cada instalación (1: abierta).
+
+    Returns:
+        tuple: Índices de las instalaciones abiertas, matriz de flujos (clientes x abiertas)
+            y costo de asignación; o None si la capacidad abierta no alcanza.
+    """
+    open_ids = np.flatnonzero(open_mask)
+    demands = problem.demands
+    capacity = problem.capacities[open_ids].astype(np.float64)
+    if len(open_ids) == 0 or capacity.sum() + EPSILON < demands.sum():
+        return None
+
+    # Costo por unidad de demanda (los costos del archivo son por atender toda la demanda).
+    safe_demands = np.where(demands > 0, demands, 1.0)
+    unit_costs = problem.costs[:, open_ids] / safe_demands[:, None]
+    num_customers, num_open = unit_costs.shape
+    flows = np.zeros((num_customers, num_open))
+    remaining = demands.astype(np.float64)
+
+    # Fase inicial: cada unidad enviada por el arco más barato de su cliente es óptima.
+    cheapest = unit_costs.argmin(axis=1)
+    for customer_id, facility_id in enumerate(cheapest.tolist()):
+        quantity = min(remaining[customer_id], capacity[facility_id])
+        if quantity > 0:
+            flows[customer_id, facility_id] += quantity
+            capacity[facility_id] -= quantity
+            remaining[customer_id] -= quantity
+
+    while remaining.max(initial=0) > EPSILON:
+        active = remaining > EPSILON
+
+        # Distancia desde la fuente a cada instalación, empezando por los clientes pendientes.
+        direct = np.where(active[:, None], unit_costs, np.inf)
+        pred_customer = direct.argmin(axis=0)
+        distance = direct[pred_customer, np.arange(num_open)]
+        pred_facility = np.full(num_open, -1)  # -1: el camino empieza en el cliente.
+
+        # Bellman-Ford: llegar a un cliente desviando su flujo de otra instalación.
+        has_flow = flows > EPSILON
+        for _ in range(num_open):
+            via = np.where(has_flow, distance[None, :] - unit_costs, np.inf)
+            via_facility = via.argmin(axis=1)
+            via_distance = via[np.arange(num_customers), via_facility]
+            candidates = via_distance[:, None] + unit_costs
+            best_customer = candidates.argmin(axis=0)
+            best_distance = candidates[best_customer, np.arange(num_open)]
+            improved = best_distance < distance - EPSILON
+            if not improved.any():
+                break
+            distance[improved] = best_distance[improved]
+            pred_customer[improved] = best_customer[improved]
+            pred_facility[improved] = via_facility[best_customer[improved]]
+
+        reachable = np.where(capacity > EPSILON, distance, np.inf)
+        target = int(reachable.argmin())
+        if not np.isfinite(reachable[target]):
+            return None
+
+        # Reconstruir el camino y calcular cuánto flujo admite.
+        path = []
+        bottleneck = capacity[target]
+        facility_id = target
+        for _ in range(num_open + 1):
+            customer_id = int(pred_customer[facility_id])
+            previous = int(pred_facility[facility_id])
+            path.append((customer_id, facility_id, previous))
+            if previous < 0:
+                break
+            bottleneck = min(bottleneck, flows[customer_id, previous])
+            facility_id = previous
+        else:
+            raise RuntimeError("Ciclo inesperado al reconstruir el camino de aumento.")
+        source = path[-1][0]
+        bottleneck = min(bottleneck, remaining[source])
+
+        for customer_id, facility_id, previous in path:
+            flows[customer_id, facility_id] += bottleneck
+            if previous >= 0:
+                flows[customer_id, previous] -= bottleneck
+        capacity[target] -= bottleneck
+        remaining[source] -= bottleneck
+
+    cost = float((flows * unit_costs).sum())
+    return open_ids, flows, cost
+
+
+def _allowed_facilities(problem, open_mask):
+    """
+    Instalaciones abiertas a las que puede ir cada cliente (costo finito), de la más barata
+    a la más cara.
+    """
+    costs = problem.costs
+    if isinstance(costs, SparseCosts):
+        ids, values = costs.ids, costs.values  # Ya ordenadas por costo.
+    else:
+        ids = np.argsort(costs, axis=1)
+        values = np.take_along_axis(costs, ids, axis=1)
+    keep = open_mask[ids] & np.isfinite(values)
+    return [row[mask].tolist() for row, mask in zip(ids, keep)]
+
+
+def _ejection_chain(problem, customer_result, spare, source, allowed):
+    """
+    Libera capacidad en la instalación `source` con una cadena de reasignaciones: un cliente
+    de source pasa a otra instalación permitida (costo finito) y, si esta no tiene espacio,
+    cede a su vez un cliente, hasta llegar a una con espacio libre. Es una búsqueda en
+    anchura sobre las instalaciones; hace falta cuando los costos dispersos (SparseCosts)
+    solo permiten unas pocas instalaciones por cliente y ningún movimiento directo cabe.
+
+    Modifica customer_result y spare en el lugar.
+
+    Args:
+        allowed (list): Instalaciones permitidas de cada cliente (ver _allowed_facilities).
+
+    Returns:
+        bool: True si se aplicó una cadena.
+    """
+    demands = problem.demands
+    # Clientes agrupados por instalación y, dentro de cada una, de menor a mayor demanda: las
+    # instalaciones se alcanzan primero con los clientes más fáciles de acomodar.
+    order = np.lexsort((demands, customer_result))
+    bounds = np.searchsorted(customer_result[order], np.arange(len(spare) + 1))
+
+    parent = {source: None}  # Instalación -> (cliente que entra, instalación de la que sale).
+    queue = deque([(source, 0.0, 0.0)])  # Instalación, demanda que recibe y demanda que sale de source.
+    while queue:
+        facility_id, incoming, released = queue.popleft()
+        for customer_id in order[bounds[facility_id]:bounds[facility_id + 1]].tolist():
+            demand = demands[customer_id]
+            if facility_id == source:
+                released = demand
+            elif spare[facility_id] + demand - incoming < min(spare[facility_id], 0) - EPSILON:
+                # Una instalación intermedia no puede quedar más sobrecargada que antes (ni pasar a
+                # estarlo) tras recibir `incoming` y ceder este cliente.
+                continue
+            for target in allowed[customer_id]:
+                # La cadena también puede cerrarse en source con un cliente de menor demanda que el que salió.
+                closes = target == source and facility_id != source and demand < released - EPSILON
+                if target in parent and not closes:
+                    continue
+                if closes or spare[target] >= demand - EPSILON:
+                    # Aplicar la cadena desde el final hasta source.
+                    while True:
+                        customer_result[customer_id] = target
+                        spare[target] -= demand
+                        spare[facility_id] += demand
+                        if parent[facility_id] is None:
+                            return True
+                        target = facility_id
+                        customer_id, facility_id = parent[facility_id]
+                        demand = demands[customer_id]
+                parent[target] = (customer_id, facility_id)
+                queue.append((target, demand, released))
+    return False
+
+
+def repair_assignment(problem, customer_result, open_mask):
+    """
+    Corrige en el lugar las instalaciones sobrecargadas moviendo los clientes que menos
+    encarecen la solución a instalaciones abiertas con capacidad libre. Si ningún cliente
+    cabe directamente en otra instalación, se prueba una cadena de expulsión (ver _ejection_chain).
+
+    Returns:
+        bool: True si la asignación quedó factible.
+    """
+    demands = problem.demands
+    costs = problem.costs
+    open_mask = np.asarray(open_mask, dtype=bool)
+    open_ids = np.flatnonzero(open_mask)
+    spare = problem.capacities - np.bincount(customer_result, weights=demands, minlength=len(open_mask))
+
+    allowed = None  # Se calcula solo si hace falta una cadena.
+    stuck = set()  # Sobrecargadas sin movimiento posible; se reintentan si otra cambia la asignación.
+    while True:
+        pending = [f for f in np.flatnonzero(spare < -EPSILON).tolist() if f not in stuck]
+        if not pending:
+            return not stuck
+        for facility_id in pending:
+            while spare[facility_id] < -EPSILON:
+                members = np.flatnonzero(customer_result == facility_id)
+                # Costo extra de mover cada cliente a su mejor alternativa con espacio.
+                feasible = spare[open_ids][None, :] >= demands[members][:, None]
+                feasible[:, open_ids == facility_id] = False
+                increase = np.where(feasible, costs[np.ix_(members, open_ids)], np.inf) - costs[members, facility_id][:, None]
+                if not np.isfinite(increase).any():
+                    if allowed is None:
+                        allowed = _allowed_facilities(problem, open_mask)
+                    if not _ejection_chain(problem, customer_result, spare, facility_id, allowed):
+                        stuck.add(facility_id)
+                        break
+                    stuck.clear()
+                    continue
+                # Preferir el menor aumento por unidad de demanda liberada.
+                per_unit = increase.min(axis=1) / np.maximum(demands[members], EPSILON)
+                row = int(per_unit.argmin())
+                customer_id = int(members[row])
+                target = int(open_ids[increase[row].argmin()])
+                customer_result[customer_id] = target
+                spare[facility_id] += demands[customer_id]
+                spare[target] -= demands[customer_id]
+                stuck.clear()
+    return True
+
+
+def improve_assignment(problem, customer_result, open_mask, max_passes=10):
+    """
+    Descenso en el lugar: mueve clientes a instalaciones abiertas más baratas con espacio
+    hasta que ninguna reasignación individual mejore.
+    """
+    demands = problem.demands
+    costs = problem.costs
+    rows = np.arange(problem.num_customers)
+    closed = np.asarray(open_mask) == 0
+    for _ in range(max_passes):
+        spare = problem.capacities - np.bincount(customer_result, weights=demands, minlength=len(open_mask))
+        feasible = spare[None, :] >= demands[:, None]
+        feasible[:, closed] = False
+        masked = np.where(feasible, costs, np.inf)
+        best = masked.argmin(axis=1)
+        gain = costs[rows, customer_result] - masked[rows, best]
+        candidates = np.flatnonzero(gain > EPSILON)
+        if len(candidates) == 0:
+            return
+        moved = False
+        spare_list = spare.tolist()
+        for customer_id in candidates[np.argsort(-gain[candidates])].tolist():
+            target = int(best[customer_id])
+            demand = demands[customer_id]
+            if demand <= spare_list[target]:
+                spare_list[int(customer_result[customer_id])] += demand
+                spare_list[target] -= demand
+                customer_result[customer_id] = target
+                moved = True
+        if not moved:
+            return
+
+
+def greedy_assignment(problem, open_mask):
+    """
+    Asignación rápida por arrepentimiento: los clientes con mayor diferencia entre su
+    mejor y segunda mejor instalación abierta eligen primero; luego se repara y mejora.
+
+    Returns:
+        array: Instalación asignada a cada cliente, o None si no se logra una asignación factible.
+    """
+    open_ids = np.flatnonzero(open_mask)
+    demands = problem.demands
+    if len(open_ids) == 0 or problem.capacities[open_ids].sum() + EPSILON < demands.sum():
+        return None
+
+    open_costs = problem.costs[:, open_ids]
+    order = np.argsort(open_costs, axis=1)
+    if len(open_ids) > 1:
+        sorted_costs = np.take_along_axis(open_costs, order[:, :2], axis=1)
+        regret = sorted_costs[:, 1] - sorted_costs[:, 0]
+    else:
+        regret = np.zeros(len(demands))
+
+    spare = problem.capacities[open_ids].tolist()
+    customer_result = np.empty(problem.num_customers, dtype=np.int64)
+    for customer_id in np.argsort(-regret, kind="stable").tolist():
+        demand = demands[customer_id]
+        preferences = order[customer_id]
+        position = int(preferences[0])
+        if demand > spare[position]:
+            # La preferida está llena: tomar la más barata con espacio o, si no hay, la preferida.
+            fitting = [int(p) for p in preferences if demand <= spare[p]]
+            if fitting:
+                position = fitting[0]
+        spare[position] -= demand
+        customer_result[customer_id] = open_ids[position]
+
+    if not repair_assignment(problem, customer_result, open_mask):
+        return None
+    improve_assignment(problem, customer_result, open_mask)
+    return customer_result
+
+
+def optimal_assignment(problem, open_mask, exact=True):
+    """
+    Calcula la asignación de costo mínimo con capacidad factible para las instalaciones
+    abiertas indicadas.
+
+    Con exact=True se resuelve el problema de transporte, se redondea cada cliente a la
+    instalación que recibe la mayor parte de su demanda y se repara; el resultado se
+    compara con la heurística voraz y se devuelve el mejor.
+
+    Args:
+        problem (CFLP): Instancia del problema.
+        open_mask (array): Estado de cada instalación (1: abierta).
+        exact (bool): Usar el problema de transporte además de la heurística voraz.
+
+    Returns:
+        tuple: Arreglo de asignaciones y su costo de asignación, o (None, inf) si no es factible.
+    """
+    rows = np.arange(problem.num_customers)
+    candidates = []
+
+    greedy = greedy_assignment(problem, open_mask)
+    if greedy is not None:
+        candidates.append(greedy)
+
+    if exact:
+        transport = transport_flows(problem, open_mask)
+        if transport is not None:
+            open_ids, flows, _ = transport
+            rounded = open_ids[flows.argmax(axis=1)]
+            if repair_assignment(problem, rounded, open_mask):
+                improve_assignment(problem, rounded, open_mask)
+                candidates.append(rounded)
+
+    if not candidates:
+        return None, float("inf")
+    costs = [float(problem.costs[rows, result].sum()) for result in candidates]
+    best = int(np.argmin(costs))
+    return candidates[best], costs[best]
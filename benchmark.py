@@ -0,0 +1,262 @@
+import os
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+import platform
+import resource
+import statistics
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from cflp import CFLP, CAPACITIES
+from solution import set_seed
+from main import nombre_instancia, optimo_instancia
+
+# Columnas de cada registro, en el orden en que se escriben al CSV.
+FIELDS = [
+    "instance", "file", "capacity_index", "seed", "params", "cost", "valid", "reference",
+    "gap", "lower_bound", "certified_gap", "time", "evaluations", "evaluations_per_second", "peak_memory_mb",
+    "stop_reason",
+]
+
+
+def parse_instance_spec(spec, folder):
+    """
+    Convierte una instancia de la línea de comandos en tareas (archivo, índice de capacidad).
+
+    Acepta "cap61", "capa" (todas sus capacidades), "capa:2" o una ruta a un archivo.
+    """
+    name, _, index = spec.partition(":")
+    path = name if os.path.exists(name) else os.path.join(folder, f"{name}.txt")
+    base_name = os.path.basename(path).split('.')[0]
+    if index:
+        return [(path, int(index))]
+    if base_name in CAPACITIES:
+        return [(path, k) for k in range(len(CAPACITIES[base_name]))]
+    return [(path, 0)]
+
+
+def load_param_sets(value):
+    """
+    Conjuntos de parámetros para simulated_annealing: JSON en línea o ruta a un archivo JSON
+    con la forma {"nombre": {parámetros}}.
+    """
+    if value is None:
+        return {"default": {}}
+    if os.path.exists(value):
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def run_case(case):
+    """
+    Ejecuta un caso del benchmark. Corre en un proceso propio para que la memoria
+    máxima medida corresponda solo a este caso.
+
+    Returns:
+        dict: Registro con las columnas de FIELDS.
+    """
+    path, capacity_index, seed, params_name, params = case
+    set_seed(seed)
+    problem = CFLP(path, capacity_index=capacity_index)
+    start_time = time.perf_counter()
+    solution = problem.simulated_annealing(**params)
+    elapsed = time.perf_counter() - start_time
+
+    reference = optimo_instancia(path, capacity_index)
+    evaluations = problem.run_stats.get("evaluations", 0)
+    # ru_maxrss está en KiB en Linux y en bytes en macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+    return {
+        "instance": nombre_instancia(path, capacity_index),
+        "file": path,
+        "capacity_index": capacity_index,
+        "seed": seed,
+        "params": params_name,
+        "cost": solution.total_cost,
+        "valid": solution.check_solution(),
+        "reference": reference,
+        "gap": None if reference is None else 100 * (solution.total_cost - reference) / reference,
+        "lower_bound": problem.run_stats.get("lower_bound"),
+        "certified_gap": problem.run_stats.get("gap"),
+        "time": elapsed,
+        "evaluations": evaluations,
+        "evaluations_per_second": evaluations / elapsed if elapsed > 0 else None,
+        "peak_memory_mb": peak_mb,
+        "stop_reason": problem.run_stats.get("stop_reason"),
+    }
+
+
+def _run_isolated(case):
+    """
+    Ejecuta un caso en un proceso nuevo de un solo uso (para Python < 3.11, sin max_tasks_per_child).
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_case, case).result()
+
+
+def run_benchmark(cases, workers=1):
+    """
+    Ejecuta los casos, cada uno en un proceso nuevo. Con workers > 1 los casos corren en
+    paralelo, lo que acelera la corrida pero puede alterar los tiempos medidos.
+
+    Returns:
+        list: Registros ordenados por instancia, parámetros y semilla.
+    """
+    records = []
+    if sys.version_info >= (3, 11):
+        executor, task = ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1), run_case
+    else:
+        # Sin max_tasks_per_child, cada hilo lanza un proceso propio por caso.
+        executor, task = ThreadPoolExecutor(max_workers=workers), _run_isolated
+    with executor:
+        futures = [executor.submit(task, case) for case in cases]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            gap = "-" if record["gap"] is None else f"{record['gap']:.3f}%"
+            print(f"[{len(records)}/{len(cases)}] {record['instance']} {record['params']} seed={record['seed']}: "
+                  f"{record['cost']:.3f} gap={gap} {record['time']:.2f}s")
+    records.sort(key=lambda r: (r["instance"], r["params"], r["seed"]))
+    return records
+
+
+def write_results(path, records, metadata):
+    """
+    Guarda los registros en JSON (con metadatos) o en CSV según la extensión.
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as f:
+            json.dump({"metadata": metadata, "results": records}, f, indent=2)
+    print(f"Resultados guardados en '{path}'.")
+
+
+def read_results(path):
+    """
+    Lee un archivo de resultados escrito por write_results().
+    """
+    if path.endswith(".csv"):
+        numeric = {"capacity_index": int, "seed": int, "cost": float, "reference": float, "gap": float,
+                   "lower_bound": float, "certified_gap": float,
+                   "time": float, "evaluations": int, "evaluations_per_second": float, "peak_memory_mb": float}
+        records = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                for key, convert in numeric.items():
+                    row[key] = convert(row[key]) if row.get(key) not in (None, "") else None
+                row["valid"] = row["valid"] == "True"
+                records.append(row)
+        return records
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.fmean(values) if values else None
+
+
+def diff_results(base_records, new_records):
+    """
+    Compara dos corridas caso por caso (instancia, parámetros, semilla) e imprime, por
+    instancia y parámetros, las medias de costo, brecha, tiempo y evaluaciones por segundo,
+    seguidas de un resumen.
+
+    Returns:
+        dict: Resumen con el número de casos comparados, mejoras y empeoramientos de costo,
+            diferencia media de brecha y razón media geométrica de tiempo (nuevo / base).
+    """
+    key = lambda r: (r["instance"], r["params"], r["seed"])
+    base = {key(r): r for r in base_records}
+    pairs = [(base[key(r)], r) for r in new_records if key(r) in base]
+    if not pairs:
+        print("No hay casos en común entre los dos archivos.")
+        return {"cases": 0}
+
+    groups = {}
+    for old, new in pairs:
+        groups.setdefault((new["instance"], new["params"]), []).append((old, new))
+
+    print(f"{'instancia':<14}{'params':<14}{'costo base':>16}{'costo nuevo':>16}{'Δbrecha %':>11}"
+          f"{'t base':>9}{'t nuevo':>9}{'ev/s base':>12}{'ev/s nuevo':>12}")
+    for (instance, params), group in sorted(groups.items()):
+        old_gap = _mean([o["gap"] for o, _ in group])
+        new_gap = _mean([n["gap"] for _, n in group])
+        gap_delta = "-" if old_gap is None or new_gap is None else f"{new_gap - old_gap:+.3f}"
+        old_rate = _mean([o["evaluations_per_second"] for o, _ in group])
+        new_rate = _mean([n["evaluations_per_second"] for _, n in group])
+        print(f"{instance:<14}{params:<14}{_mean([o['cost'] for o, _ in group]):>16.3f}"
+              f"{_mean([n['cost'] for _, n in group]):>16.3f}{gap_delta:>11}"
+              f"{_mean([o['time'] for o, _ in group]):>9.2f}{_mean([n['time'] for _, n in group]):>9.2f}"
+              f"{(old_rate or 0):>12.1f}{(new_rate or 0):>12.1f}")
+
+    better = sum(1 for old, new in pairs if new["cost"] < old["cost"] - 1e-6)
+    worse = sum(1 for old, new in pairs if new["cost"] > old["cost"] + 1e-6)
+    gap_deltas = [new["gap"] - old["gap"] for old, new in pairs if old["gap"] is not None and new["gap"] is not None]
+    ratios = [new["time"] / old["time"] for old, new in pairs if old["time"] > 0 and new["time"] > 0]
+    summary = {
+        "cases": len(pairs),
+        "better": better,
+        "worse": worse,
+        "mean_gap_delta": _mean(gap_deltas),
+        "time_ratio": math.exp(statistics.fmean(math.log(r) for r in ratios)) if ratios else None,
+        "invalid": sum(1 for _, new in pairs if not new["valid"]),
+    }
+    print("-" * 40)
+    print(f"Casos comparados: {summary['cases']} (mejores: {better}, peores: {worse}, inválidos nuevos: {summary['invalid']})")
+    if summary["mean_gap_delta"] is not None:
+        print(f"Diferencia media de brecha: {summary['mean_gap_delta']:+.4f} puntos porcentuales")
+    if summary["time_ratio"] is not None:
+        print(f"Razón media geométrica de tiempo (nuevo/base): {summary['time_ratio']:.3f}")
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark reproducible del solver CFLP.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Ejecutar instancias x semillas x conjuntos de parámetros.")
+    run.add_argument("instances", nargs="+", help="Instancias: cap61, capa, capa:2 o rutas a archivos.")
+    run.add_argument("--carpeta", default="./instances", help="Carpeta con las instancias.")
+    run.add_argument("--semillas", type=int, nargs="+", default=[1, 2, 3], help="Semillas explícitas.")
+    run.add_argument("--params", default=None,
+                     help='Conjuntos de parámetros: JSON {"nombre": {...}} en línea o ruta a un archivo.')
+    run.add_argument("--procesos", type=int, default=1, help="Casos en paralelo (altera los tiempos).")
+    run.add_argument("--salida", default="benchmark.json", help="Archivo de salida (.json o .csv).")
+
+    diff = subparsers.add_parser("diff", help="Comparar dos archivos de resultados.")
+    diff.add_argument("base")
+    diff.add_argument("nuevo")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "run":
+        param_sets = load_param_sets(args.params)
+        cases = [
+            (path, capacity_index, seed, name, params)
+            for spec in args.instances
+            for path, capacity_index in parse_instance_spec(spec, args.carpeta)
+            for name, params in param_sets.items()
+            for seed in args.semillas
+        ]
+        metadata = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processors": os.cpu_count(),
+            "workers": args.procesos,
+            "param_sets": param_sets,
+        }
+        write_results(args.salida, run_benchmark(cases, args.procesos), metadata)
+    else:
+        diff_results(read_results(args.base), read_results(args.nuevo))
@@ -0,0 +1,204 @@
+import os  # Rutas de las instancias.
+import math  # Comparaciones con infinito.
+import time  # Límite de tiempo de la búsqueda.
+import heapq  # Cola de nodos ordenada por cota.
+import argparse  # Línea de comandos.
+import numpy as np  # Estados de las instalaciones.
+from assignment import transport_flows
+from lower_bound import lagrangian_bound, lagrangian_value, gap_percent
+from solution import Solution
+
+# Tolerancia para decidir si una fracción de apertura es 0 o 1.
+EPSILON = 1e-9
+
+
+class BranchAndBoundResult:
+    def __init__(self, open_mask, cost, lower_bound, proven, nodes, elapsed, solution):
+        """
+        Resultado de branch_and_bound().
+
+        Args:
+            open_mask (array): Instalaciones abiertas en la mejor solución (1: abierta).
+            cost (float): Costo óptimo (o el mejor encontrado) con demanda divisible entre instalaciones.
+            lower_bound (float): Cota inferior demostrada; igual a cost si proven es True.
+            proven (bool): True si se exploró todo el árbol (cost es el óptimo).
+            nodes (int): Nodos explorados.
+            elapsed (float): Tiempo de la búsqueda en segundos.
+            solution (Solution): Mejor solución de fuente única conocida para el conjunto
+                abierto (o la solución inicial, si es mejor), o None si no se encontró.
+        """
+        self.open_mask = open_mask
+        self.cost = cost
+        self.lower_bound = lower_bound
+        self.proven = proven
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.solution = solution
+
+    @property
+    def gap(self):
+        """
+        Brecha en porcentaje entre el mejor costo y la cota inferior.
+        """
+        return gap_percent(self.cost, self.lower_bound)
+
+
+def split_cost(problem, open_mask):
+    """
+    Costo de un conjunto de instalaciones abiertas cuando cada cliente puede repartir su
+    demanda: problema de transporte más los costos fijos de las instalaciones que reciben flujo.
+
+    Returns:
+        tuple: Costo y máscara de las instalaciones usadas, o (inf, None) si no es factible.
+    """
+    transport = transport_flows(problem, open_mask)
+    if transport is None:
+        return math.inf, None
+    open_ids, flows, assignment_cost = transport
+    used = np.zeros(problem.num_facilities, dtype=np.int8)
+    used[open_ids[flows.sum(axis=0) > EPSILON]] = 1
+    return assignment_cost + float(problem.fixed_costs[used == 1].sum()), used
+
+
+def _branching_facility(opened, free):
+    """
+    Instalación libre sobre la que se ramifica: la de apertura más fraccionaria o, si la
+    relajación es entera, la primera abierta en ella (y si no, la primera libre).
+    """
+    candidates = np.flatnonzero(free)
+    fractional = np.abs(opened[candidates] - 0.5)
+    position = int(fractional.argmin())
+    if fractional[position] < 0.5 - EPSILON:
+        return int(candidates[position])
+    open_free = candidates[opened[candidates] > 0.5]
+    return int(open_free[0]) if len(open_free) else int(candidates[0])
+
+
+def branch_and_bound(problem, incumbent=None, node_limit=100000, time_limit=None, tolerance=1e-7,
+                     root_iterations=300, node_iterations=40):
+    """
+    Branch and bound exacto sobre las decisiones de abrir o cerrar instalaciones.
+
+    Resuelve el CFLP con demanda divisible (el problema de las tablas de óptimos de
+    OR-Library): cada nodo fija algunas instalaciones abiertas o cerradas, se acota con la
+    relajación lagrangiana (ver lower_bound.py, con multiplicadores heredados del padre) y
+    se evalúa de forma exacta con el problema de transporte el conjunto abierto por la
+    relajación, que actualiza la mejor solución. Los nodos se exploran por menor cota.
+
+    Args:
+        problem (CFLP): Instancia del problema.
+        incumbent (Solution): Solución inicial; por defecto, una corrida corta de
+            simulated_annealing en modo "facilities".
+        node_limit (int): Nodos máximos a explorar.
+        time_limit (float): Tiempo máximo en segundos.
+        tolerance (float): Tolerancia relativa para podar nodos con cota igual a la mejor solución.
+        root_iterations (int): Iteraciones del subgradiente en la raíz.
+        node_iterations (int): Iteraciones del subgradiente en los demás nodos.
+
+    Returns:
+        BranchAndBoundResult: Mejor solución, cota y estadísticas de la búsqueda.
+    """
+    start_time = time.perf_counter()
+    if incumbent is None:
+        incumbent = problem.simulated_annealing(search="facilities", max_evaluations=2000)
+
+    evaluated = {}  # Costo divisible de los conjuntos ya evaluados.
+
+    def evaluate(mask):
+        key = mask.tobytes()
+        if key not in evaluated:
+            evaluated[key] = split_cost(problem, mask)
+        return evaluated[key]
+
+    best_cost, best_mask = evaluate(incumbent.facility_result.astype(np.int8))
+    if best_mask is None:
+        best_cost, best_mask = math.inf, None
+
+    num_facilities = problem.num_facilities
+    no_facilities = np.zeros(num_facilities, dtype=bool)
+    bound, multipliers = lagrangian_bound(problem, best_cost, max_iterations=root_iterations)
+    queue = [(bound, 0, no_facilities, no_facilities, multipliers)]
+    counter = 1
+    nodes = 0
+    proven = True
+
+    while queue:
+        bound, _, forced_open, forced_closed, multipliers = heapq.heappop(queue)
+        if bound >= best_cost - tolerance * abs(best_cost):
+            continue
+        if nodes >= node_limit or (time_limit is not None and time.perf_counter() - start_time >= time_limit):
+            heapq.heappush(queue, (bound, counter, forced_open, forced_closed, multipliers))
+            proven = False
+            break
+        nodes += 1
+
+        # Solución del nodo: instalaciones fijadas abiertas más las que abre la relajación.
+        _, _, opened = lagrangian_value(problem, multipliers, forced_open, forced_closed)
+        if opened is None:
+            continue
+        mask = ((opened > EPSILON) | forced_open).astype(np.int8)
+        cost, used = evaluate(mask)
+        if cost < best_cost:
+            best_cost, best_mask = cost, used
+
+        free = ~(forced_open | forced_closed)
+        if not free.any():
+            continue  # Nodo hoja: el conjunto abierto ya quedó evaluado.
+        facility_id = _branching_facility(opened, free)
+        for open_branch in (True, False):
+            child_open, child_closed = forced_open.copy(), forced_closed.copy()
+            (child_open if open_branch else child_closed)[facility_id] = True
+            child_bound, child_multipliers = lagrangian_bound(
+                problem, best_cost, multipliers, child_open, child_closed, max_iterations=node_iterations,
+                patience=5,
+            )
+            child_bound = max(child_bound, bound)  # La cota del padre también vale para el hijo.
+            if child_bound < best_cost - tolerance * abs(best_cost):
+                heapq.heappush(queue, (child_bound, counter, child_open, child_closed, child_multipliers))
+                counter += 1
+
+    lower_bound = best_cost
+    if not proven:
+        lower_bound = min(best_cost, min(node[0] for node in queue))
+
+    # Mejor solución de fuente única: la del conjunto óptimo o la inicial si es mejor.
+    solution = incumbent
+    if best_mask is not None:
+        customer_result, single_cost = problem.evaluate_open_set(best_mask, exact=True)
+        if customer_result is not None and single_cost < incumbent.total_cost:
+            solution = Solution.from_assignment(problem, customer_result)
+
+    return BranchAndBoundResult(best_mask, best_cost, lower_bound, proven, nodes,
+                                time.perf_counter() - start_time, solution)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Resolver instancias CFLP de forma exacta con branch and bound.")
+    parser.add_argument("instances", nargs="*", help="Instancias (cap61, capa:0, rutas); por defecto, todas las regulares.")
+    parser.add_argument("--carpeta", default="./instances", help="Carpeta con las instancias.")
+    parser.add_argument("--limite-nodos", type=int, default=100000, help="Nodos máximos por instancia.")
+    parser.add_argument("--tiempo-limite", type=float, default=None, help="Segundos máximos por instancia.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from cflp import CFLP
+    from main import listar_instancias, nombre_instancia, optimo_instancia
+    from benchmark import parse_instance_spec
+
+    args = parse_args()
+    if args.instances:
+        tasks = [task for spec in args.instances for task in parse_instance_spec(spec, args.carpeta)]
+    else:
+        regulares = listar_instancias(args.carpeta, excluir=["capa.txt", "capb.txt", "capc.txt"])
+        tasks = [(os.path.join(args.carpeta, archivo), 0) for archivo in sorted(regulares)]
+
+    for path, capacity_index in tasks:
+        problem = CFLP(path, capacity_index=capacity_index)
+        result = branch_and_bound(problem, node_limit=args.limite_nodos, time_limit=args.tiempo_limite)
+        reference = optimo_instancia(path, capacity_index)
+        status = "óptimo" if result.proven else f"cota {result.lower_bound:.3f} (brecha {result.gap:.4f}%)"
+        # Los óptimos de la tabla tienen tres decimales.
+        check = "" if reference is None else f", tabla {reference} ({'coincide' if abs(result.cost - reference) <= 5e-3 else 'difiere'})"
+        print(f"{nombre_instancia(path, capacity_index)}: {result.cost:.3f} {status}, {result.nodes} nodos, "
+              f"{result.elapsed:.2f}s, fuente única {result.solution.total_cost:.3f}{check}")
@@ -1,7 +1,18 @@
 import math  # Biblioteca para operaciones matemáticas.
-from solution import Solution  # Clase Solution para manejar las soluciones del problema.
+from solution import Solution, get_rng_state, set_rng_state  # Soluciones y estado de los generadores.
+from assignment import optimal_assignment  # Asignación óptima de clientes para instalaciones fijas.
+from constructors import build_solution  # Constructores de la solución inicial.
+from checkpoint import save_checkpoint, load_checkpoint  # Puntos de control de búsquedas largas.
+from lower_bound import lagrangian_bound, gap_percent  # Cota inferior y brecha certificada.
+from sparse_costs import SparseCosts, require_dense  # Costos de las k instalaciones más baratas por cliente.
+from instrumentation import NEIGHBOR, LOCAL_SEARCH, EVALUATION, ACCEPTANCE  # Fases cronometradas.
+from profiles import load_profile, instance_family  # Parámetros ajustados por familia de instancias.
 import random  # Biblioteca para generación de números aleatorios.
 import os  # Para manejar rutas de archivos.
+import hashlib  # Hash del archivo para identificar su versión compilada.
+import warnings  # Errores de conversión de NumPy en el analizador.
+import time  # Límites de tiempo de la búsqueda.
+import numpy as np  # Vectores y matrices de la instancia.
 
 # Capacidades predefinidas para archivos especiales.
 CAPACITIES = {
@@ -10,6 +21,168 @@ CAPACITIES = {
     "capc": [5000, 5750, 6500, 7250],
 }
 
+# Tamaño de los bloques que lee el analizador de instancias.
+CHUNK_SIZE = 1 << 20
+
+# Marcador de capacidad de los archivos especiales de la OR-Library.
+CAPACITY_TOKEN = b"capacity"
+
+# Mejora relativa de la solución conocida a partir de la cual se vuelve a optimizar la cota.
+BOUND_REFRESH = 0.01
+
+
+def _parse_numbers(block, capacity_value):
+    """
+    Convierte un bloque de texto en un vector float64, reemplazando el marcador 'capacity'.
+    """
+    if not block.strip():
+        return np.empty(0)  # np.fromstring devuelve [-1.] para un texto sin números.
+    if CAPACITY_TOKEN in block:
+        if capacity_value is None:
+            raise ValueError("El archivo usa 'capacity' pero no se indicó un valor de capacidad.")
+        block = block.replace(CAPACITY_TOKEN, repr(float(capacity_value)).encode())
+    with warnings.catch_warnings():
+        # Versiones antiguas de NumPy solo advierten cuando un número no se puede leer.
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(block.decode("ascii"), sep=" ")
+        except (ValueError, DeprecationWarning, UnicodeDecodeError) as error:
+            raise ValueError(f"Valor no numérico en el archivo de instancia: {error}") from None
+
+
+def iter_number_blocks(file, capacity_value=None, chunk_size=CHUNK_SIZE):
+    """
+    Lee un archivo binario por bloques y entrega los números de cada bloque como vectores.
+
+    Los saltos de línea no importan: cada bloque se corta en el último espacio en blanco y
+    el resto pasa al bloque siguiente, así ningún número queda partido.
+    """
+    carry = b""
+    while True:
+        block = file.read(chunk_size)
+        if not block:
+            break
+        block = carry + block
+        cut = max(block.rfind(b" "), block.rfind(b"\n"), block.rfind(b"\t"), block.rfind(b"\r"))
+        if cut < 0:
+            carry = block
+            continue
+        carry = block[cut + 1:]
+        yield _parse_numbers(block[:cut + 1], capacity_value)
+    if carry.strip():
+        yield _parse_numbers(carry, capacity_value)
+
+
+def parse_instance_file(file_path, capacity_value=None, chunk_size=CHUNK_SIZE):
+    """
+    Analiza un archivo de instancia en formato OR-Library como un flujo de números.
+
+    El formato es: m n, luego (capacidad, costo fijo) por instalación y, por cliente, la demanda
+    seguida de sus m costos de asignación, sin importar cómo estén repartidos en líneas. Los
+    valores se copian directamente a un arreglo reservado al conocer m y n.
+
+    Args:
+        file_path (str): Ruta al archivo.
+        capacity_value (float): Valor que reemplaza el marcador 'capacity', si el archivo lo usa.
+        chunk_size (int): Tamaño en bytes de cada bloque leído.
+
+    Returns:
+        tuple: Vectores de capacidades, costos fijos y demandas, y la matriz de costos (clientes x instalaciones).
+    """
+    values = None
+    header = np.empty(0)
+    filled = 0
+    with open(file_path, 'rb') as file:
+        for numbers in iter_number_blocks(file, capacity_value, chunk_size):
+            if values is None:
+                # Reservar todo al conocer m y n.
+                header = np.concatenate((header, numbers))
+                if len(header) < 2:
+                    continue
+                m, n = int(header[0]), int(header[1])
+                values = np.empty(2 * m + n * (m + 1), dtype=np.float64)
+                numbers = header[2:]
+            if filled + len(numbers) > len(values):
+                raise ValueError(f"El archivo {file_path} tiene más datos de los esperados para {m}x{n}.")
+            values[filled:filled + len(numbers)] = numbers
+            filled += len(numbers)
+
+    if values is None or filled != len(values):
+        raise ValueError(f"El archivo {file_path} está incompleto.")
+
+    facilities = values[:2 * m].reshape(m, 2)
+    customers = values[2 * m:].reshape(n, m + 1)
+    return facilities[:, 0].copy(), facilities[:, 1].copy(), customers[:, 0].copy(), customers[:, 1:]
+
+
+def parse_sparse_instance(file_path, k, capacity_value=None, chunk_size=CHUNK_SIZE):
+    """
+    Lee un archivo de instancia conservando solo las k instalaciones más baratas de cada
+    cliente. Los clientes se procesan por lotes a medida que se leen, así la matriz densa
+    nunca se guarda completa en memoria.
+
+    Args:
+        file_path (str): Ruta al archivo.
+        k (int): Instalaciones que se conservan por cliente.
+        capacity_value (float): Valor que reemplaza el marcador 'capacity', si el archivo lo usa.
+        chunk_size (int): Tamaño en bytes de cada bloque leído.
+
+    Returns:
+        tuple: Vectores de capacidades, costos fijos y demandas, y la matriz SparseCosts.
+    """
+    pending = np.empty(0)
+    header = None
+    capacities = fixed_costs = demands = ids = values = None
+    row = 0
+    with open(file_path, 'rb') as file:
+        for numbers in iter_number_blocks(file, capacity_value, chunk_size):
+            pending = np.concatenate((pending, numbers))
+            if header is None:
+                if len(pending) < 2:
+                    continue
+                m, n = int(pending[0]), int(pending[1])
+                header = (m, n)
+                pending = pending[2:]
+                k = max(1, min(k, m))
+                demands = np.empty(n)
+                ids = np.empty((n, k), dtype=np.int32)
+                values = np.empty((n, k))
+            if capacities is None:
+                if len(pending) < 2 * m:
+                    continue
+                facilities = pending[:2 * m].reshape(m, 2)
+                capacities, fixed_costs = facilities[:, 0].copy(), facilities[:, 1].copy()
+                pending = pending[2 * m:]
+
+            complete = len(pending) // (m + 1)
+            if row + complete > n:
+                raise ValueError(f"El archivo {file_path} tiene más datos de los esperados para {m}x{n}.")
+            row = _store_rows(pending[:complete * (m + 1)].reshape(complete, m + 1), row, demands, ids, values)
+            pending = pending[complete * (m + 1):]
+
+    if header is None or capacities is None:
+        raise ValueError(f"El archivo {file_path} está incompleto.")
+    complete = len(pending) // (m + 1)
+    if row + complete != n or len(pending) != complete * (m + 1):
+        raise ValueError(f"El archivo {file_path} no tiene los datos esperados para {m}x{n}.")
+    _store_rows(pending.reshape(complete, m + 1), row, demands, ids, values)
+    return capacities, fixed_costs, demands, SparseCosts(ids, values, m)
+
+
+def _store_rows(rows, start, demands, ids, values):
+    """
+    Guarda un lote de filas de clientes (demanda seguida de sus costos) en forma dispersa.
+    """
+    if len(rows) == 0:
+        return start
+    stop = start + len(rows)
+    sparse = SparseCosts.from_dense(rows[:, 1:], ids.shape[1])
+    demands[start:stop] = rows[:, 0]
+    ids[start:stop] = sparse.ids
+    values[start:stop] = sparse.values
+    return stop
+
+
 def parse_large_file(file_path, capacity_index):
     """
     Procesa un archivo grande reemplazando 'capacity' con un valor específico.
@@ -19,123 +192,554 @@ def parse_large_file(file_path, capacity_index):
         capacity_index (int): Índice para seleccionar el valor de capacidad.
     
     Returns:
-        tuple: Una lista de instalaciones y una lista de clientes.
+        tuple: Vectores de capacidades, costos fijos y demandas, y la matriz de costos (clientes x instalaciones).
     """
-    facilities = []
-    customers = []
-
     # Determinar el tipo de archivo según su nombre.
     base_name = os.path.basename(file_path).split('.')[0]
     if base_name not in CAPACITIES:
         raise ValueError(f"Archivo {base_name} no es un tipo especial reconocido (capa, capb, capc).")
 
     # Obtener el valor de capacidad correspondiente.
-    capacity_value = CAPACITIES[base_name][capacity_index]
+    return parse_instance_file(file_path, CAPACITIES[base_name][capacity_index])
+
+
+def compiled_path(file_path, capacity_index, capacity=None):
+    """
+    Ruta del archivo compilado de una instancia, junto al archivo de texto y
+    identificado por el hash del contenido y el índice (o valor explícito) de capacidad.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    key = f"c{capacity_index}" if capacity is None else f"v{float(capacity):g}"
+    return f"{file_path}.{digest.hexdigest()[:16]}.{key}.cache.npy"
+
+
+def write_compiled(path, capacities, fixed_costs, demands, costs):
+    """
+    Guarda la instancia como un único vector float64 en formato .npy:
+    [m, n, capacidades (m), costos fijos (m), demandas (n), costos (n*m)].
+    La escritura es atómica para que varios procesos puedan compilar a la vez.
+    """
+    m, n = len(capacities), len(demands)
+    buffer = np.concatenate(([m, n], capacities, fixed_costs, demands, np.asarray(costs).ravel()))
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        np.save(f, buffer)
+    os.replace(temporary, path)
+
+
+def open_compiled(path):
+    """
+    Abre un archivo compilado con mapeo en memoria. Los arreglos devueltos son vistas de
+    solo lectura sobre el archivo, compartidas entre procesos por el sistema operativo.
+    """
+    buffer = np.asarray(np.load(path, mmap_mode='r'))
+    m, n = int(buffer[0]), int(buffer[1])
+    if len(buffer) != 2 + 2 * m + n + n * m:
+        raise ValueError(f"Archivo compilado inválido: {path}")
+    offset = 2
+    capacities = buffer[offset:offset + m]
+    fixed_costs = buffer[offset + m:offset + 2 * m]
+    demands = buffer[offset + 2 * m:offset + 2 * m + n]
+    costs = buffer[offset + 2 * m + n:].reshape(n, m)
+    return capacities, fixed_costs, demands, costs
+
+
+def load_instance(file_path, capacity_index=0, use_cache=True, capacity=None, nearest=None):
+    """
+    Carga una instancia, usando su versión compilada si existe y creándola si no.
+
+    Args:
+        file_path (str): Ruta al archivo de texto.
+        capacity_index (int): Índice para seleccionar capacidad en CAPACITIES (para archivos especiales).
+        use_cache (bool): Leer y escribir el archivo compilado.
+        capacity (float): Valor explícito para el marcador 'capacity'; tiene prioridad sobre CAPACITIES.
+        nearest (int): Si se indica, conservar solo esa cantidad de instalaciones más baratas por
+            cliente (SparseCosts). Este modo lee el texto directamente, sin archivo compilado.
+
+    Returns:
+        tuple: Vectores de capacidades, costos fijos y demandas, y la matriz de costos.
+    """
+    use_cache = use_cache and nearest is None
+    cache_path = compiled_path(file_path, capacity_index, capacity) if use_cache else None
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            return open_compiled(cache_path)
+        except (OSError, ValueError):
+            pass  # Archivo dañado o incompleto: se vuelve a compilar.
+
+    base_name = os.path.basename(file_path).split('.')[0]
+    if capacity is None and base_name in CAPACITIES:
+        # Archivos especiales: la capacidad sale de CAPACITIES.
+        print(f"Procesando archivo especial: {base_name}")
+        capacity = CAPACITIES[base_name][capacity_index]
+    if nearest is not None:
+        return parse_sparse_instance(file_path, nearest, capacity)
+    arrays = parse_instance_file(file_path, capacity)
 
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        m, n = map(int, lines[0].split())  # Número de instalaciones y clientes.
-        facility_lines = lines[1:1 + m]
-        customer_lines = lines[1 + m:]
+    if cache_path is not None:
+        try:
+            write_compiled(cache_path, *arrays)
+            return open_compiled(cache_path)
+        except OSError:
+            pass  # Carpeta de solo lectura: se usa la instancia en memoria.
+    return arrays
 
-        # Procesar instalaciones.
-        for line in facility_lines:
-            parts = line.split()
-            facilities.append({
-                'capacity': capacity_value,  # Reemplaza 'capacity' por el valor específico.
-                'fixed_cost': float(parts[1])
-            })
+def _lap(tracer, phase, clock):
+    """
+    Suma al tracer el tiempo transcurrido desde clock y devuelve el instante actual.
+    """
+    now = time.perf_counter()
+    tracer.add_time(phase, now - clock)
+    return now
+
+
+def candidate_facilities(costs, k):
+    """
+    Índices de las k instalaciones más baratas de cada cliente, ordenadas por costo.
 
-        # Procesar clientes.
-        for line in customer_lines:
-            parts = line.split()
-            customers.append({
-                'demand': float(parts[0]),
-                'costs': [float(c) for c in parts[1:]]
-            })
+    Args:
+        costs (array): Matriz de costos (clientes x instalaciones).
+        k (int): Número de candidatas por cliente.
 
-    return facilities, customers
+    Returns:
+        array: Matriz de índices (clientes x k).
+    """
+    k = max(1, min(k, costs.shape[1]))
+    if k < costs.shape[1]:
+        nearest = np.argpartition(costs, k - 1, axis=1)[:, :k]
+    else:
+        nearest = np.broadcast_to(np.arange(k), costs.shape).copy()
+    order = np.take_along_axis(costs, nearest, axis=1).argsort(axis=1)
+    return np.take_along_axis(nearest, order, axis=1)
 
 
 class CFLP:
-    def __init__(self, file_path, capacity_index=0):
+    def __init__(self, file_path, capacity_index=0, use_cache=True, capacity=None, candidate_size=10, nearest=None):
         """
         Inicializa una instancia del problema CFLP.
         
         Args:
-            file_path (str): Ruta al archivo de datos.
+            file_path (str): Ruta al archivo de datos (None para una instancia creada con from_arrays).
             capacity_index (int): Índice para seleccionar capacidad en CAPACITIES (para archivos especiales).
+            use_cache (bool): Usar el archivo compilado junto al archivo de texto (ver load_instance).
+            capacity (float): Valor para el marcador 'capacity' del archivo, en lugar de CAPACITIES.
+            candidate_size (int): Instalaciones más baratas por cliente en la lista de candidatas.
+            nearest (int): Guardar solo las `nearest` instalaciones más baratas de cada cliente
+                (SparseCosts); las demás asignaciones quedan prohibidas. Pensado para instancias
+                grandes con el recocido en modo "customers".
         """
         self.file_path = file_path
         self.capacity_index = capacity_index
-        self.facilities = []
-        self.customers = []
-        self.read_instance()
+        self.use_cache = use_cache
+        self.capacity = capacity
+        self.nearest = nearest
+        self.capacities = None   # Capacidad de cada instalación (m).
+        self.fixed_costs = None  # Costo fijo de cada instalación (m).
+        self.demands = None      # Demanda de cada cliente (n).
+        self.costs = None        # Costo de asignar cada cliente a cada instalación (n x m, densa o SparseCosts).
+        self.run_stats = {}      # Estadísticas de la última ejecución de simulated_annealing.
+        self.candidate_size = candidate_size
+        self._candidates = None  # Se calcula al primer uso (ver candidates).
+        self.bound = None        # Cota inferior lagrangiana, calculada al primer uso (ver lower_bound).
+        self.bound_upper = None  # Costo de la solución con que se calculó la cota.
+        self.multipliers = None  # Multiplicadores de la cota.
+        if file_path is not None:
+            self.read_instance()
+
+    @classmethod
+    def from_arrays(cls, capacities, fixed_costs, demands, costs, candidate_size=10):
+        """
+        Crea una instancia a partir de sus vectores y su matriz de costos, sin archivo.
+
+        Args:
+            capacities (array): Capacidad de cada instalación (m).
+            fixed_costs (array): Costo fijo de cada instalación (m).
+            demands (array): Demanda de cada cliente (n).
+            costs (array o SparseCosts): Costo de asignar cada cliente a cada instalación (n x m).
+            candidate_size (int): Instalaciones más baratas por cliente en la lista de candidatas.
+        """
+        problem = cls(None, use_cache=False, candidate_size=candidate_size)
+        problem.capacities = np.asarray(capacities, dtype=np.float64)
+        problem.fixed_costs = np.asarray(fixed_costs, dtype=np.float64)
+        problem.demands = np.asarray(demands, dtype=np.float64)
+        problem.costs = costs if isinstance(costs, SparseCosts) else np.asarray(costs, dtype=np.float64)
+        return problem
+
+    @property
+    def num_facilities(self):
+        return len(self.capacities)
+
+    @property
+    def num_customers(self):
+        return len(self.demands)
+
+    @property
+    def candidates(self):
+        """
+        Lista de candidatas: las candidate_size instalaciones más baratas de cada cliente,
+        ordenadas por costo (clientes x candidate_size).
+        """
+        if self._candidates is None:
+            if isinstance(self.costs, SparseCosts):
+                self._candidates = self.costs.nearest(self.candidate_size)
+            else:
+                self._candidates = candidate_facilities(self.costs, self.candidate_size)
+        return self._candidates
+
+    def lower_bound(self, upper_bound=None, refresh=BOUND_REFRESH, **kwargs):
+        """
+        Cota inferior lagrangiana de la instancia. La primera vez se calcula con la mejor
+        entre upper_bound y la solución voraz; después se guarda junto con ese costo y solo
+        se vuelve a optimizar, partiendo de los multiplicadores guardados, cuando upper_bound
+        lo mejora en más de la fracción `refresh`.
+
+        Args:
+            upper_bound (float): Costo de una solución conocida, para el paso del subgradiente.
+            refresh (float): Mejora relativa de upper_bound que obliga a recalcular la cota.
+            **kwargs: Parámetros adicionales de lagrangian_bound.
+
+        Returns:
+            float: Cota inferior del costo de cualquier solución factible.
+        """
+        require_dense(self.costs, "La cota inferior")
+        if self.bound is None:
+            greedy_cost = build_solution(self, "greedy").total_cost
+            upper_bound = greedy_cost if upper_bound is None else min(upper_bound, greedy_cost)
+        elif upper_bound is None or upper_bound >= self.bound_upper * (1 - refresh):
+            return self.bound
+        bound, multipliers = lagrangian_bound(self, upper_bound, multipliers=self.multipliers, **kwargs)
+        if self.bound is None or bound > self.bound:
+            self.bound, self.multipliers = bound, multipliers
+        self.bound_upper = upper_bound
+        return self.bound
 
     def read_instance(self):
         """
-        Lee el archivo de datos y construye las listas de instalaciones y clientes.
+        Lee el archivo de datos y construye los vectores y la matriz de costos de la instancia.
+        Las lecturas posteriores usan el archivo compilado con mapeo en memoria.
         """
-        # Determinar si el archivo es especial (capa, capb, capc) o regular.
-        base_name = os.path.basename(self.file_path).split('.')[0]
-        if base_name in CAPACITIES:
-            # Usar parse_large_file para archivos especiales.
-            print(f"Procesando archivo especial: {base_name}")
-            self.facilities, self.customers = parse_large_file(self.file_path, self.capacity_index)
-        else:
-            # Leer archivo regular.
-            with open(self.file_path, 'r') as f:
-                m, n = map(int, f.readline().split())
-                for _ in range(m):
-                    capacity, fixed_cost = map(float, f.readline().split())
-                    self.facilities.append({
-                        'capacity': capacity,
-                        'fixed_cost': fixed_cost
-                    })
-                for _ in range(n):
-                    line = f.readline().split()
-                    demand = float(line[0])
-                    costs = list(map(float, line[1:]))
-                    self.customers.append({
-                        'demand': demand,
-                        'costs': costs
-                    })
-
-    def simulated_annealing(self, temperature=1000, cooling_rate=0.9995, iterations=10, accept_temperature=0.01):
+        self.capacities, self.fixed_costs, self.demands, self.costs = load_instance(
+            self.file_path, self.capacity_index, self.use_cache, self.capacity, self.nearest
+        )
+
+    def evaluate_open_set(self, open_mask, exact=False):
+        """
+        Evalúa un conjunto de instalaciones abiertas con su asignación óptima de clientes.
+
+        Args:
+            open_mask (array): Estado de cada instalación (1: abierta).
+            exact (bool): Resolver el problema de transporte además de la heurística voraz.
+
+        Returns:
+            tuple: Asignación de clientes y costo total (solo se cobran las instalaciones
+                que reciben clientes), o (None, inf) si el conjunto no es factible.
+        """
+        customer_result, assignment_cost = optimal_assignment(self, open_mask, exact=exact)
+        if customer_result is None:
+            return None, math.inf
+        used = np.bincount(customer_result, minlength=self.num_facilities) > 0
+        return customer_result, assignment_cost + float(self.fixed_costs[used].sum())
+
+    def simulated_annealing(self, temperature=1000, cooling_rate=0.9995, iterations=10, accept_temperature=0.01,
+                            search="customers", exact_assignment=False, time_limit=None, max_evaluations=None,
+                            target_cost=None, target_gap=None, reference_cost=None, stagnation=None,
+                            gap_limit=None, initial=None, tracer=None, checkpoint_path=None,
+                            checkpoint_interval=60, resume=False, batch_size=256, local_search_size=100,
+                            profile=None):
         """
         Implementa el algoritmo de recocido simulado para optimizar el problema CFLP.
+
+        Sin presupuesto, la temperatura baja geométricamente con cooling_rate hasta accept_temperature.
+        Con time_limit o max_evaluations, la temperatura sigue la misma curva geométrica entre
+        temperature y accept_temperature pero en función de la fracción de presupuesto consumida,
+        de modo que el programa de enfriamiento se ajusta al presupuesto (cooling_rate se ignora).
         
         Args:
             temperature (float): Temperatura inicial para el algoritmo.
             cooling_rate (float): Tasa de enfriamiento para reducir la temperatura.
             iterations (int): Número de iteraciones por cada temperatura.
             accept_temperature (float): Temperatura mínima para detener el algoritmo.
+            search (str): "customers" mueve clientes e instalaciones; "facilities" solo abre y
+                cierra instalaciones y asigna los clientes de forma óptima en cada vecino;
+                "batch" evalúa en cada paso un lote de movimientos con arreglos (ver
+                Solution.batch_moves) y cuenta cada movimiento del lote como un vecino.
+            exact_assignment (bool): En modo "facilities", evaluar cada vecino con el problema
+                de transporte en lugar de solo la heurística voraz.
+            time_limit (float): Tiempo máximo en segundos.
+            max_evaluations (int): Número máximo de vecinos evaluados.
+            target_cost (float): Detener al alcanzar este costo.
+            target_gap (float): Detener al quedar a este porcentaje de reference_cost.
+            reference_cost (float): Costo de referencia para target_gap (por ejemplo, el óptimo conocido).
+            stagnation (int): Detener tras este número de vecinos sin mejorar la mejor solución.
+            gap_limit (float): Detener cuando la brecha certificada contra la cota inferior
+                lagrangiana (ver lower_bound) queda bajo este porcentaje.
+            initial (str o Solution): Constructor de la solución inicial (ver constructors.CONSTRUCTORS)
+                o una solución de partida; por defecto, "random" en modo "customers" y todas las
+                instalaciones abiertas en "facilities".
+            tracer (SearchTracer): Instrumentación opcional (ver instrumentation.py).
+            checkpoint_path (str): Archivo donde guardar periódicamente el estado de la búsqueda
+                (ver checkpoint.py). Se borra al terminar la ejecución.
+            checkpoint_interval (float): Segundos entre puntos de control.
+            resume (bool): Continuar desde checkpoint_path si existe. Con los mismos parámetros,
+                la búsqueda sigue exactamente como si no se hubiera interrumpido.
+            batch_size (int): Movimientos por paso en modo "batch".
+            local_search_size (int): Clientes que revisa la búsqueda local de cada paso (modo "customers").
+            profile (str o dict): Archivo de perfiles escrito por tuning.py (se usa el perfil de la
+                familia de la instancia, ver profiles.instance_family) o directamente un
+                diccionario de parámetros. Los valores del perfil reemplazan a temperature,
+                cooling_rate, iterations, accept_temperature y local_search_size.
         
         Returns:
-            Solution: La mejor solución encontrada.
+            Solution: La mejor solución encontrada. Las estadísticas de la ejecución quedan en self.run_stats.
         """
-        current_solution = Solution(self.facilities, self.customers)
-        best_solution = current_solution
-        print(f"Costo inicial: {current_solution.total_cost}")
+        if profile is not None:
+            if not isinstance(profile, dict):
+                profile = load_profile(instance_family(self.file_path), profile) if self.file_path else {}
+            temperature = profile.get("temperature", temperature)
+            cooling_rate = profile.get("cooling_rate", cooling_rate)
+            iterations = profile.get("iterations", iterations)
+            accept_temperature = profile.get("accept_temperature", accept_temperature)
+            local_search_size = profile.get("local_search_size", local_search_size)
+        if target_gap is not None:
+            if reference_cost is None:
+                raise ValueError("target_gap requiere reference_cost.")
+            gap_target = reference_cost * (1 + target_gap / 100)
+            target_cost = gap_target if target_cost is None else max(target_cost, gap_target)
+        budgeted = time_limit is not None or max_evaluations is not None
+
+        start_time = time.perf_counter()
+        if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+            state = load_checkpoint(checkpoint_path)
+            if state["search"] != search or len(state["current_customers"]) != self.num_customers:
+                raise ValueError(f"El punto de control '{checkpoint_path}' no corresponde a esta búsqueda.")
+            current_solution = Solution.from_assignment(self, state["current_customers"], state["current_facilities"])
+            current_solution.total_cost = state["current_cost"]
+            best_solution = Solution.from_assignment(self, state["best_customers"], state["best_facilities"]).snapshot()
+            best_solution.total_cost = state["best_cost"]
+            set_rng_state(state["rng_state"])
+            evaluations = state["evaluations"]
+            since_improvement = state["since_improvement"]
+            t = state["temperature"]
+            start_time -= state["elapsed"]
+            print(f"Reanudando desde '{checkpoint_path}' con costo {best_solution.total_cost}")
+        else:
+            current_solution = self.initial_solution(search, exact_assignment, initial)
+            best_solution = current_solution.snapshot()  # Solo asignaciones y costo.
+            print(f"Costo inicial: {current_solution.total_cost}")
+            evaluations = 0
+            since_improvement = 0
+            t = temperature
+        gap_cost = None
+        if gap_limit is not None:
+            gap_cost = self.lower_bound(best_solution.total_cost) * (1 + gap_limit / 100)
 
-        t = temperature
+        evaluated = {}  # Costos de conjuntos de instalaciones ya evaluados (modo "facilities").
+        stop_reason = "temperature"
+        last_checkpoint = time.perf_counter()
+        step_evaluations = batch_size if search == "batch" else 1
 
-        while t > accept_temperature:
-            for _ in range(iterations):
-                new_solution = current_solution.generate_neighbor()
-                new_solution.local_search(max_customers=100)
+        while True:
+            if budgeted:
+                progress = 0.0
+                if time_limit is not None:
+                    progress = (time.perf_counter() - start_time) / time_limit
+                if max_evaluations is not None:
+                    progress = max(progress, evaluations / max_evaluations)
+                if progress >= 1:
+                    stop_reason = "budget"
+                    break
+                t = temperature * (accept_temperature / temperature) ** progress
+            elif t <= accept_temperature:
+                break
 
-                if (
-                    new_solution.total_cost < current_solution.total_cost
-                    or random.random() < math.exp(
-                        -(new_solution.total_cost - current_solution.total_cost) / t
-                    )
-                ):
-                    current_solution = new_solution
-                    if new_solution.total_cost < best_solution.total_cost:
-                        best_solution = new_solution
+            for _ in range(iterations):
+                current_solution = self.anneal_step(
+                    current_solution, t, search, evaluated, exact_assignment, tracer, batch_size, local_search_size
+                )
+                evaluations += step_evaluations
+                if current_solution.total_cost < best_solution.total_cost:
+                    best_solution.update(current_solution)
+                    since_improvement = 0
+                else:
+                    since_improvement += step_evaluations
+                if tracer is not None:
+                    tracer.after_step(t, current_solution.total_cost, best_solution.total_cost)
 
-            t *= cooling_rate
+            if gap_cost is not None:
+                # La cota se vuelve a optimizar cuando la mejor solución mejora lo suficiente.
+                gap_cost = self.lower_bound(best_solution.total_cost) * (1 + gap_limit / 100)
+                if best_solution.total_cost <= gap_cost:
+                    stop_reason = "gap"
+                    break
+            if target_cost is not None and best_solution.total_cost <= target_cost:
+                stop_reason = "target"
+                break
+            if stagnation is not None and since_improvement >= stagnation:
+                stop_reason = "stagnation"
+                break
+            if not budgeted:
+                t *= cooling_rate
+            if checkpoint_path is not None and time.perf_counter() - last_checkpoint >= checkpoint_interval:
+                save_checkpoint(checkpoint_path, current_solution, best_solution, t, evaluations, since_improvement,
+                                time.perf_counter() - start_time, get_rng_state(), search)
+                last_checkpoint = time.perf_counter()
 
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        best_solution = self.polish_solution(best_solution.restore(self), search)
+        if tracer is not None:
+            tracer.sample(t, current_solution.total_cost, best_solution.total_cost)
+        self.run_stats = {
+            "evaluations": evaluations,
+            "elapsed": time.perf_counter() - start_time,
+            "final_temperature": t,
+            "stop_reason": stop_reason,
+            "lower_bound": self.bound,
+            "gap": None if self.bound is None else gap_percent(best_solution.total_cost, self.bound),
+        }
         return best_solution
 
+    def initial_solution(self, search="customers", exact_assignment=False, initial=None):
+        """
+        Construye la solución de partida de un modo de búsqueda, o con el constructor
+        `initial` si se indica uno. Si `initial` es una Solution, se parte de una copia.
+        """
+        if search not in ("customers", "facilities", "batch"):
+            raise ValueError(f"Modo de búsqueda desconocido: {search}")
+        if search == "facilities":
+            require_dense(self.costs, 'El modo "facilities"')
+        if isinstance(initial, Solution):
+            return initial.copy()
+        if initial is not None:
+            return build_solution(self, initial)
+        if search in ("customers", "batch"):
+            return Solution(self)
+        # Modo "facilities": todas las instalaciones abiertas; solo quedan las que reciben clientes.
+        result, _ = self.evaluate_open_set(np.ones(self.num_facilities, dtype=np.int8), exact_assignment)
+        if result is None:
+            raise ValueError("La capacidad total de las instalaciones no alcanza para la demanda.")
+        return Solution.from_assignment(self, result)
+
+    def anneal_step(self, current_solution, t, search="customers", evaluated=None, exact_assignment=False,
+                    tracer=None, batch_size=256, local_search_size=100):
+        """
+        Ejecuta un paso de recocido simulado: genera un vecino y lo acepta con el criterio de Metropolis.
+
+        Args:
+            current_solution (Solution): Solución actual.
+            t (float): Temperatura actual.
+            search (str): Modo de búsqueda ("customers", "facilities" o "batch").
+            evaluated (dict): Caché de costos por conjunto de instalaciones (modo "facilities").
+            exact_assignment (bool): Evaluar con el problema de transporte (modo "facilities").
+            tracer (SearchTracer): Instrumentación opcional; recibe el tiempo de cada fase.
+            batch_size (int): Movimientos por paso (modo "batch").
+            local_search_size (int): Clientes de la búsqueda local (modo "customers").
+
+        Returns:
+            Solution: La solución actual después del paso (puede ser el mismo objeto modificado).
+        """
+        if search == "facilities":
+            return self._facility_step(
+                current_solution, t, {} if evaluated is None else evaluated, exact_assignment, tracer
+            )
+        if search == "batch":
+            return self._batch_step(current_solution, t, batch_size, tracer)
+
+        if tracer is not None:
+            clock = time.perf_counter()
+        # El vecino se aplica en el lugar y se deshace si no se acepta.
+        previous_cost = current_solution.total_cost
+        moves = current_solution.neighbor_moves()
+        if tracer is not None:
+            clock = _lap(tracer, NEIGHBOR, clock)
+        undo = current_solution.apply_moves(moves)
+        if tracer is not None:
+            clock = _lap(tracer, EVALUATION, clock)
+        undo += current_solution.local_search(max_customers=local_search_size)
+        if tracer is not None:
+            clock = _lap(tracer, LOCAL_SEARCH, clock)
+        delta = current_solution.total_cost - previous_cost
+
+        accepted = delta < 0 or random.random() < math.exp(-delta / t)
+        if not accepted:
+            current_solution.rollback(undo)
+            current_solution.total_cost = previous_cost
+        if tracer is not None:
+            _lap(tracer, ACCEPTANCE, clock)
+            tracer.record_move(t, delta, accepted)
+        return current_solution
+
+    def _facility_step(self, current_solution, t, evaluated, exact_assignment, tracer=None):
+        """
+        Paso del modo "facilities": abre, cierra o intercambia una instalación y evalúa el
+        conjunto resultante con evaluate_open_set().
+        """
+        if tracer is not None:
+            clock = time.perf_counter()
+        mask = current_solution.facility_result.copy()
+        open_ids = np.flatnonzero(mask)
+        closed_ids = np.flatnonzero(mask == 0)
+        if len(closed_ids) and (random.random() < 0.5 or len(open_ids) <= 1):
+            mask[closed_ids[random.randrange(len(closed_ids))]] = 1
+        if len(open_ids) > 1 and (random.random() < 0.5 or mask.sum() == len(open_ids)):
+            mask[open_ids[random.randrange(len(open_ids))]] = 0
+
+        if tracer is not None:
+            clock = _lap(tracer, NEIGHBOR, clock)
+
+        key = mask.tobytes()
+        candidate = None
+        cost = evaluated.get(key)
+        if cost is None:
+            result, cost = self.evaluate_open_set(mask, exact_assignment)
+            evaluated[key] = cost
+            if result is not None:
+                candidate = Solution.from_assignment(self, result)
+
+        if tracer is not None:
+            clock = _lap(tracer, EVALUATION, clock)
+
+        delta = cost - current_solution.total_cost
+        accepted = delta < 0 or (math.isfinite(delta) and random.random() < math.exp(-delta / t))
+        if accepted:
+            if candidate is None:
+                # Conjunto ya visto: la asignación es determinista, se vuelve a calcular.
+                result, _ = self.evaluate_open_set(mask, exact_assignment)
+                candidate = Solution.from_assignment(self, result)
+            current_solution = candidate
+        if tracer is not None:
+            _lap(tracer, ACCEPTANCE, clock)
+            tracer.record_move(t, delta, accepted)
+        return current_solution
+
+    def _batch_step(self, current_solution, t, batch_size, tracer=None):
+        """
+        Paso del modo "batch": genera y evalúa un lote de movimientos con arreglos y aplica
+        los aceptados que no se pisan (ver Solution.batch_moves y Solution.apply_batch).
+        """
+        if tracer is not None:
+            clock = time.perf_counter()
+        batch = current_solution.batch_moves(batch_size)
+        if tracer is not None:
+            clock = _lap(tracer, EVALUATION, clock)
+        applied, delta = current_solution.apply_batch(batch, t)
+        if tracer is not None:
+            _lap(tracer, ACCEPTANCE, clock)
+            tracer.record_move(t, delta, applied > 0)
+        return current_solution
+
+    def polish_solution(self, solution, search="customers"):
+        """
+        Ajuste final de la mejor solución de una búsqueda.
+        """
+        if search == "facilities":
+            # Pulir el mejor conjunto con el problema de transporte.
+            result, cost = self.evaluate_open_set(solution.facility_result, exact=True)
+            if result is not None and cost < solution.total_cost:
+                return Solution.from_assignment(self, result)
+        # Recalcular para eliminar el error de redondeo acumulado por los deltas.
+        solution.calculate_total_cost()
+        return solution
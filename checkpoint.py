@@ -0,0 +1,72 @@
+import os  # Reemplazo atómico del archivo.
+import json  # Estado de los generadores aleatorios.
+import numpy as np  # Formato .npz.
+
+# Versión del formato; se rechazan puntos de control de otra versión.
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path, current_solution, best_solution, temperature, evaluations, since_improvement,
+                    elapsed, rng_state, search):
+    """
+    Guarda el estado de una búsqueda en un archivo .npz comprimido. Se escribe en un
+    archivo temporal y se reemplaza al final, de modo que una interrupción a mitad de la
+    escritura deja intacto el punto de control anterior.
+
+    Args:
+        path (str): Ruta del punto de control.
+        current_solution (Solution): Solución actual.
+        best_solution (SolutionSnapshot): Mejor solución encontrada.
+        temperature (float): Temperatura actual.
+        evaluations (int): Vecinos evaluados.
+        since_improvement (int): Vecinos evaluados desde la última mejora.
+        elapsed (float): Segundos de búsqueda transcurridos.
+        rng_state (dict): Estado de los generadores aleatorios (ver solution.get_rng_state).
+        search (str): Modo de búsqueda.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            version=CHECKPOINT_VERSION,
+            current_customers=current_solution.customer_result,
+            current_facilities=current_solution.facility_result,
+            current_cost=current_solution.total_cost,
+            best_customers=best_solution.customer_result,
+            best_facilities=best_solution.facility_result,
+            best_cost=best_solution.total_cost,
+            counters=np.array([evaluations, since_improvement], dtype=np.int64),
+            times=np.array([temperature, elapsed]),
+            rng_state=json.dumps(rng_state),
+            search=search,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """
+    Lee un punto de control escrito por save_checkpoint().
+
+    Returns:
+        dict: Arreglos de la solución actual y la mejor, sus costos, temperatura,
+            contadores, tiempo transcurrido, estado de los generadores y modo de búsqueda.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != CHECKPOINT_VERSION:
+            raise ValueError(f"Versión de punto de control no soportada: {int(data['version'])}")
+        evaluations, since_improvement = data["counters"].tolist()
+        temperature, elapsed = data["times"].tolist()
+        return {
+            "current_customers": data["current_customers"],
+            "current_facilities": data["current_facilities"],
+            "current_cost": float(data["current_cost"]),
+            "best_customers": data["best_customers"],
+            "best_facilities": data["best_facilities"],
+            "best_cost": float(data["best_cost"]),
+            "evaluations": evaluations,
+            "since_improvement": since_improvement,
+            "temperature": temperature,
+            "elapsed": elapsed,
+            "rng_state": json.loads(str(data["rng_state"])),
+            "search": str(data["search"]),
+        }
@@ -0,0 +1,194 @@
+import numpy as np  # Operaciones vectorizadas sobre la matriz de costos.
+from assignment import greedy_assignment, optimal_assignment, repair_assignment, improve_assignment
+from solution import Solution
+from sparse_costs import require_dense
+
+# Tolerancia para comparar capacidades y costos.
+EPSILON = 1e-9
+
+
+def _star_greedy(problem):
+    """
+    Voraz por costo por unidad de demanda: en cada paso se elige la instalación y el grupo
+    de clientes sin asignar (los más baratos por unidad de demanda para ella, mientras
+    quepan) con menor (costo fijo + costos de asignación) / demanda atendida. El costo fijo
+    se cobra solo la primera vez que se usa la instalación.
+
+    Returns:
+        array: Instalación asignada a cada cliente (-1 si no se pudo asignar).
+    """
+    demands = problem.demands
+    costs = problem.costs
+    columns = np.arange(problem.num_facilities)
+    unit_costs = costs / np.maximum(demands, EPSILON)[:, None]
+    spare = problem.capacities.astype(np.float64)
+    opened = np.zeros(problem.num_facilities, dtype=bool)
+    customer_result = np.full(problem.num_customers, -1, dtype=np.int64)
+
+    while (customer_result < 0).any():
+        pending = customer_result < 0
+        order = np.where(pending[:, None], unit_costs, np.inf).argsort(axis=0)
+        taken = pending[order]
+        served = np.cumsum(np.where(taken, demands[order], 0.0), axis=0)
+        assignment_costs = np.cumsum(np.where(taken, costs[order, columns], 0.0), axis=0)
+        fits = taken & (served <= spare[None, :])
+        ratio = np.where(fits, (np.where(opened, 0.0, problem.fixed_costs) + assignment_costs)
+                         / np.maximum(served, EPSILON), np.inf)
+        size, facility_id = np.unravel_index(ratio.argmin(), ratio.shape)
+        if not np.isfinite(ratio[size, facility_id]):
+            break  # Ningún cliente pendiente cabe completo en el orden de ninguna instalación.
+        customers = order[:size + 1, facility_id]
+        customer_result[customers] = facility_id
+        spare[facility_id] -= served[size, facility_id]
+        opened[facility_id] = True
+
+    # Clientes que no entraron en ningún grupo: la instalación más barata con espacio.
+    for customer_id in np.flatnonzero(customer_result < 0).tolist():
+        feasible = np.flatnonzero(spare >= demands[customer_id])
+        if len(feasible) == 0:
+            raise ValueError(f"No se puede asignar al cliente {customer_id}, demanda excede la capacidad disponible.")
+        facility_id = int(feasible[costs[customer_id, feasible].argmin()])
+        customer_result[customer_id] = facility_id
+        spare[facility_id] -= demands[customer_id]
+    return customer_result
+
+
+def _finish(problem, customer_result):
+    """
+    Mejora una asignación con descenso sobre las instalaciones que usa.
+    """
+    open_mask = np.bincount(customer_result, minlength=problem.num_facilities) > 0
+    improve_assignment(problem, customer_result, open_mask)
+    return customer_result
+
+
+def random_construct(problem):
+    """
+    Constructor original: cada cliente, en orden aleatorio, elige por costo con ruido
+    (ver Solution.random_generate).
+    """
+    return Solution(problem).customer_result
+
+
+def greedy_construct(problem):
+    """
+    Voraz por costo por unidad de demanda (ver _star_greedy), seguido de descenso.
+    """
+    return _finish(problem, _star_greedy(problem))
+
+
+def regret_construct(problem):
+    """
+    Instalaciones elegidas por el voraz por costo por unidad de demanda y clientes
+    reasignados por arrepentimiento sobre ellas (ver assignment.greedy_assignment): eligen
+    primero los de mayor diferencia entre su mejor y su segunda mejor instalación.
+    """
+    customer_result = _star_greedy(problem)
+    open_mask = np.bincount(customer_result, minlength=problem.num_facilities) > 0
+    regret = greedy_assignment(problem, open_mask)
+    return customer_result if regret is None else regret
+
+
+def drop_add_construct(problem, max_checks=3):
+    """
+    Heurística de cierre y apertura: parte con todas las instalaciones abiertas, cierra
+    mientras el ahorro estimado se confirme y luego intenta abrir las cerradas. El ahorro
+    de cada cambio se estima con arreglos y solo se verifican, con la asignación voraz,
+    las max_checks mejores estimaciones.
+
+    Returns:
+        array: Instalación asignada a cada cliente.
+    """
+    demands = problem.demands
+    costs = problem.costs
+    fixed_costs = problem.fixed_costs
+    rows = np.arange(problem.num_customers)
+
+    def total(customer_result, open_mask):
+        return float(costs[rows, customer_result].sum() + fixed_costs[open_mask].sum())
+
+    open_mask = np.ones(problem.num_facilities, dtype=bool)
+    customer_result, _ = optimal_assignment(problem, open_mask, exact=False)
+    if customer_result is None:
+        raise ValueError("La capacidad total de las instalaciones no alcanza para la demanda.")
+    open_mask = np.bincount(customer_result, minlength=problem.num_facilities) > 0
+    best_cost = total(customer_result, open_mask)
+
+    def try_masks(candidates):
+        nonlocal customer_result, open_mask, best_cost
+        for mask in candidates:
+            if problem.capacities[mask].sum() + EPSILON < demands.sum():
+                continue
+            result, _ = optimal_assignment(problem, mask, exact=False)
+            if result is None:
+                continue
+            used = np.bincount(result, minlength=problem.num_facilities) > 0
+            cost = total(result, used)
+            if cost < best_cost - EPSILON:
+                customer_result, open_mask, best_cost = result, used, cost
+                return True
+        return False
+
+    # Cierre: ahorro del costo fijo menos el aumento de mover sus clientes a su segunda opción abierta.
+    while open_mask.sum() > 1:
+        current_costs = costs[rows, customer_result]
+        open_costs = np.where(open_mask[None, :], costs, np.inf)
+        open_costs[rows, customer_result] = np.inf
+        increase = np.bincount(customer_result, weights=open_costs.min(axis=1) - current_costs,
+                               minlength=problem.num_facilities)
+        saving = np.where(open_mask, fixed_costs - increase, -np.inf)
+        order = np.argsort(-saving)[:max_checks]
+        candidates = []
+        for facility_id in order[saving[order] > 0].tolist():
+            mask = open_mask.copy()
+            mask[facility_id] = False
+            candidates.append(mask)
+        if not try_masks(candidates):
+            break
+
+    # Apertura: ahorro de los clientes que prefieren la instalación cerrada menos su costo fijo.
+    while not open_mask.all():
+        current_costs = costs[rows, customer_result]
+        gain = np.maximum(current_costs[:, None] - costs, 0.0).sum(axis=0)
+        saving = np.where(open_mask, -np.inf, gain - fixed_costs)
+        order = np.argsort(-saving)[:max_checks]
+        candidates = []
+        for facility_id in order[saving[order] > 0].tolist():
+            mask = open_mask.copy()
+            mask[facility_id] = True
+            candidates.append(mask)
+        if not try_masks(candidates):
+            break
+
+    improve_assignment(problem, customer_result, open_mask)
+    return customer_result
+
+
+# Constructores disponibles para simulated_annealing(initial=...).
+CONSTRUCTORS = {
+    "random": random_construct,
+    "greedy": greedy_construct,
+    "regret": regret_construct,
+    "drop_add": drop_add_construct,
+}
+
+
+def build_solution(problem, name):
+    """
+    Construye una solución con uno de los constructores de CONSTRUCTORS.
+
+    Args:
+        problem (CFLP): Instancia del problema.
+        name (str): Nombre del constructor.
+
+    Returns:
+        Solution: Solución con exactamente las instalaciones que reciben clientes abiertas.
+    """
+    if name not in CONSTRUCTORS:
+        raise ValueError(f"Constructor desconocido: {name}")
+    if name != "random":
+        require_dense(problem.costs, f"El constructor '{name}'")
+    customer_result = CONSTRUCTORS[name](problem)
+    if not repair_assignment(problem, customer_result, np.ones(problem.num_facilities, dtype=bool)):
+        raise ValueError("No se pudo construir una asignación factible.")
+    return Solution.from_assignment(problem, customer_result)
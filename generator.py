@@ -0,0 +1,118 @@
+import argparse  # Línea de comandos.
+import numpy as np  # Coordenadas, demandas y costos aleatorios.
+
+# Clientes cuyos costos se calculan y escriben por lote.
+ROW_BATCH = 1000
+
+
+def generate_instance(num_facilities, num_customers, tightness=1.5, seed=0):
+    """
+    Genera los datos de una instancia geométrica: instalaciones y clientes en el cuadrado
+    unitario, costo de asignación proporcional a la distancia por la demanda (como en
+    OR-Library, el costo de atender toda la demanda del cliente) y costos fijos que crecen
+    con la capacidad.
+
+    Args:
+        num_facilities (int): Número de instalaciones.
+        num_customers (int): Número de clientes.
+        tightness (float): Capacidad total dividida por la demanda total (debe ser > 1);
+            valores cercanos a 1 dan instancias más ajustadas.
+        seed (int): Semilla del generador.
+
+    Returns:
+        tuple: Vectores de capacidades, costos fijos y demandas, coordenadas de las
+            instalaciones y de los clientes (ver cost_rows).
+    """
+    if tightness <= 1:
+        raise ValueError("La holgura debe ser mayor que 1 para que la instancia sea factible.")
+    rng = np.random.default_rng(seed)
+    facility_points = rng.random((num_facilities, 2))
+    customer_points = rng.random((num_customers, 2))
+    demands = rng.integers(5, 36, size=num_customers).astype(np.float64)
+
+    # Capacidades repartidas al azar alrededor de la media que da la holgura pedida.
+    shares = rng.uniform(0.5, 1.5, size=num_facilities)
+    capacities = np.ceil(shares / shares.sum() * tightness * demands.sum())
+    capacities = np.maximum(capacities, demands.max())
+    fixed_costs = np.round(rng.uniform(0, 90, size=num_facilities) + 10 * np.sqrt(capacities), 3)
+    return capacities, fixed_costs, demands, facility_points, customer_points
+
+
+def cost_rows(demands, facility_points, customer_points, start, stop, scale=100.0):
+    """
+    Costos de asignación de los clientes start..stop-1 (filas densas clientes x instalaciones).
+    """
+    distances = np.linalg.norm(customer_points[start:stop, None, :] - facility_points[None, :, :], axis=2)
+    return np.round(scale * distances * demands[start:stop, None], 3)
+
+
+def _format_number(value):
+    """
+    Texto exacto de un número: entero sin decimales o, si no, repr (el formato :g redondea a 6 cifras).
+    """
+    return f"{value:.0f}" if value.is_integer() else repr(value)
+
+
+def write_instance(path, capacities, fixed_costs, demands, rows):
+    """
+    Escribe una instancia en el formato de OR-Library: "m n", una línea "capacidad costo"
+    por instalación y, por cliente, su demanda seguida de sus costos de asignación.
+
+    Args:
+        path (str): Ruta del archivo.
+        capacities (array): Capacidad de cada instalación.
+        fixed_costs (array): Costo fijo de cada instalación.
+        demands (array): Demanda de cada cliente.
+        rows (iterable): Lotes de filas de costos (clientes x instalaciones) en orden de
+            cliente; también puede ser la matriz completa.
+    """
+    with open(path, "w") as f:
+        f.write(f"{len(capacities)} {len(demands)}\n")
+        for capacity, fixed_cost in zip(capacities.tolist(), fixed_costs.tolist()):
+            f.write(f"{_format_number(capacity)} {fixed_cost:.3f}\n")
+        demand_values = demands.tolist()
+        customer_id = 0
+        for batch in (rows if not isinstance(rows, np.ndarray) else [rows]):
+            for row in batch:
+                f.write(f"{_format_number(demand_values[customer_id])}\n")
+                f.write(" ".join(f"{value:.3f}" for value in row.tolist()))
+                f.write("\n")
+                customer_id += 1
+    if customer_id != len(demands):
+        raise ValueError(f"Se escribieron {customer_id} clientes de {len(demands)}.")
+
+
+def generate_to_file(path, num_facilities, num_customers, tightness=1.5, seed=0):
+    """
+    Genera una instancia y la escribe en path calculando los costos por lotes de clientes,
+    de modo que la matriz completa nunca está en memoria.
+
+    Returns:
+        tuple: Vectores de capacidades, costos fijos y demandas.
+    """
+    capacities, fixed_costs, demands, facility_points, customer_points = generate_instance(
+        num_facilities, num_customers, tightness, seed
+    )
+    batches = (
+        cost_rows(demands, facility_points, customer_points, start, min(start + ROW_BATCH, num_customers))
+        for start in range(0, num_customers, ROW_BATCH)
+    )
+    write_instance(path, capacities, fixed_costs, demands, batches)
+    return capacities, fixed_costs, demands
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generar instancias CFLP geométricas en el formato de OR-Library.")
+    parser.add_argument("archivo", help="Ruta del archivo de salida.")
+    parser.add_argument("--instalaciones", type=int, default=100, help="Número de instalaciones.")
+    parser.add_argument("--clientes", type=int, default=1000, help="Número de clientes.")
+    parser.add_argument("--holgura", type=float, default=1.5, help="Capacidad total / demanda total (> 1).")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    capacities, _, demands = generate_to_file(args.archivo, args.instalaciones, args.clientes, args.holgura, args.semilla)
+    print(f"{args.archivo}: {args.instalaciones} instalaciones, {args.clientes} clientes, "
+          f"holgura {capacities.sum() / demands.sum():.3f}")
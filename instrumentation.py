@@ -0,0 +1,138 @@
+import csv
+import json
+import math
+import time
+
+# Fases del paso de recocido que se cronometran.
+NEIGHBOR = "neighbor"          # Generación del vecino.
+LOCAL_SEARCH = "local_search"  # Búsqueda local sobre el vecino.
+EVALUATION = "evaluation"      # Cálculo del costo del vecino.
+ACCEPTANCE = "acceptance"      # Criterio de Metropolis y deshacer/aplicar.
+PHASES = (NEIGHBOR, LOCAL_SEARCH, EVALUATION, ACCEPTANCE)
+
+
+class SearchTracer:
+    """
+    Instrumentación opcional del recocido simulado.
+
+    Se pasa como `tracer` a CFLP.simulated_annealing; sin tracer el bucle no hace ningún
+    trabajo extra. Registra el tiempo acumulado de cada fase, tasas de aceptación y mejora
+    por banda de temperatura (una banda por década: [1, 10), [10, 100), ...) y una traza
+    muestreada de (tiempo, temperatura, costo actual, mejor costo).
+    """
+
+    def __init__(self, sample_interval=100, callback=None):
+        """
+        Args:
+            sample_interval (int): Pasos entre muestras de la traza.
+            callback (callable): Función llamada con cada muestra (dict) al registrarla.
+        """
+        self.sample_interval = sample_interval
+        self.callback = callback
+        self.phase_times = dict.fromkeys(PHASES, 0.0)
+        self.bands = {}   # banda -> [pasos, aceptados, mejoras]
+        self.trace = []   # Muestras de la traza.
+        self.steps = 0
+        self.start_time = time.perf_counter()
+
+    def add_time(self, phase, seconds):
+        """
+        Suma tiempo a una fase.
+        """
+        self.phase_times[phase] += seconds
+
+    def record_move(self, t, delta, accepted):
+        """
+        Registra el resultado de un paso en la banda de su temperatura.
+        """
+        band = math.floor(math.log10(t)) if t > 0 else -math.inf
+        counters = self.bands.get(band)
+        if counters is None:
+            counters = self.bands[band] = [0, 0, 0]
+        counters[0] += 1
+        counters[1] += accepted
+        counters[2] += delta < 0
+
+    def after_step(self, t, current_cost, best_cost):
+        """
+        Cuenta un paso y toma una muestra de la traza cada sample_interval pasos.
+        """
+        self.steps += 1
+        if self.steps % self.sample_interval == 0:
+            self.sample(t, current_cost, best_cost)
+
+    def sample(self, t, current_cost, best_cost):
+        """
+        Agrega una muestra a la traza y la entrega al callback.
+        """
+        sample = {
+            "step": self.steps,
+            "time": time.perf_counter() - self.start_time,
+            "temperature": t,
+            "current_cost": current_cost,
+            "best_cost": best_cost,
+        }
+        self.trace.append(sample)
+        if self.callback is not None:
+            self.callback(sample)
+
+    def band_rates(self):
+        """
+        Tasas por banda de temperatura, de la más caliente a la más fría.
+
+        Returns:
+            list: Diccionarios con la banda, sus límites, pasos y tasas de aceptación y mejora.
+        """
+        rates = []
+        for band in sorted(self.bands, reverse=True):
+            steps, accepted, improved = self.bands[band]
+            rates.append({
+                "band": band,
+                "min_temperature": 10.0 ** band,
+                "max_temperature": 10.0 ** (band + 1),
+                "steps": steps,
+                "acceptance_rate": accepted / steps,
+                "improvement_rate": improved / steps,
+            })
+        return rates
+
+    def summary(self):
+        """
+        Resumen serializable: tiempos por fase, tasas por banda y traza.
+        """
+        return {
+            "steps": self.steps,
+            "elapsed": time.perf_counter() - self.start_time,
+            "phase_times": dict(self.phase_times),
+            "bands": self.band_rates(),
+            "trace": list(self.trace),
+        }
+
+    def to_json(self, path):
+        """
+        Guarda el resumen completo en JSON.
+        """
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_csv(self, path):
+        """
+        Guarda la traza muestreada en CSV.
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["step", "time", "temperature", "current_cost", "best_cost"])
+            writer.writeheader()
+            writer.writerows(self.trace)
+
+    def print_report(self):
+        """
+        Imprime los tiempos por fase y las tasas por banda de temperatura.
+        """
+        total = sum(self.phase_times.values()) or 1.0
+        print(f"Pasos: {self.steps}")
+        for phase, seconds in self.phase_times.items():
+            print(f"  {phase:<14}{seconds:>10.3f}s {100 * seconds / total:>6.1f}%")
+        for rates in self.band_rates():
+            print(f"  T en [{rates['min_temperature']:g}, {rates['max_temperature']:g}): "
+                  f"{rates['steps']} pasos, aceptación {100 * rates['acceptance_rate']:.1f}%, "
+                  f"mejora {100 * rates['improvement_rate']:.1f}%")
@@ -0,0 +1,172 @@
+import math  # Comparaciones con infinito.
+import time  # Límite de tiempo del subgradiente.
+import numpy as np  # Operaciones vectorizadas sobre la matriz de costos.
+from sparse_costs import require_dense  # La cota necesita la matriz completa.
+
+# Tolerancia para comparar cotas y capacidades.
+EPSILON = 1e-9
+
+
+def knapsack_values(reduced_costs, demands, capacities):
+    """
+    Resuelve, para cada instalación, la mochila fraccionaria del subproblema lagrangiano:
+    atender las fracciones de clientes con costo reducido negativo, de menor costo reducido
+    por unidad de demanda a mayor, hasta llenar la capacidad.
+
+    Args:
+        reduced_costs (array): Costos reducidos c_ij - λ_i (clientes x instalaciones).
+        demands (array): Demanda de cada cliente.
+        capacities (array): Capacidad de cada instalación.
+
+    Returns:
+        tuple: Valor de la mochila de cada instalación (<= 0) y fracción atendida de cada
+            cliente por cada instalación (clientes x instalaciones).
+    """
+    # Los clientes sin demanda no ocupan capacidad: su razón es la menor y se atienden completos.
+    safe_demands = np.maximum(demands, EPSILON)[:, None]
+    ratio = np.where(reduced_costs < 0, reduced_costs / safe_demands, np.inf)
+    order = ratio.argsort(axis=0)
+    sorted_demands = demands[order]
+    used_before = np.cumsum(sorted_demands, axis=0) - sorted_demands
+    sorted_fractions = np.clip((capacities[None, :] - used_before) / np.maximum(sorted_demands, EPSILON), 0.0, 1.0)
+    sorted_fractions[~np.isfinite(np.take_along_axis(ratio, order, axis=0))] = 0.0
+
+    fractions = np.empty_like(sorted_fractions)
+    np.put_along_axis(fractions, order, sorted_fractions, axis=0)
+    values = (fractions * np.minimum(reduced_costs, 0.0)).sum(axis=0)
+    return values, fractions
+
+
+def select_facilities(values, capacities, total_demand, forced_open=None, forced_closed=None):
+    """
+    Relajación lineal de la elección de instalaciones con la restricción agregada de
+    capacidad (la capacidad abierta debe cubrir la demanda total): se abren todas las de
+    valor negativo y, si falta capacidad, las de menor valor por unidad de capacidad.
+
+    Args:
+        values (array): Costo fijo más valor de la mochila de cada instalación.
+        capacities (array): Capacidad de cada instalación.
+        total_demand (float): Demanda total de los clientes.
+        forced_open (array): Instalaciones que deben quedar abiertas (booleanos), opcional.
+        forced_closed (array): Instalaciones que deben quedar cerradas (booleanos), opcional.
+
+    Returns:
+        array: Fracción abierta de cada instalación, o None si ni abriendo todas las
+            instalaciones permitidas se cubre la demanda.
+    """
+    allowed = np.ones(len(values), dtype=bool) if forced_closed is None else ~forced_closed
+    opened = np.where(allowed & (values < 0), 1.0, 0.0)
+    if forced_open is not None:
+        opened[forced_open] = 1.0
+    missing = total_demand - float(capacities @ opened)
+    if missing <= EPSILON:
+        return opened
+
+    pending = np.flatnonzero(allowed & (opened == 0))
+    if capacities[pending].sum() + EPSILON < missing:
+        return None
+    for facility_id in pending[np.argsort(values[pending] / np.maximum(capacities[pending], EPSILON))].tolist():
+        fraction = min(1.0, missing / capacities[facility_id]) if capacities[facility_id] > 0 else 0.0
+        opened[facility_id] = fraction
+        missing -= fraction * capacities[facility_id]
+        if missing <= EPSILON:
+            break
+    return opened
+
+
+def lagrangian_value(problem, multipliers, forced_open=None, forced_closed=None):
+    """
+    Evalúa la función lagrangiana para unos multiplicadores dados.
+
+    Se relajan las restricciones de asignación (cada cliente atendido una vez); el
+    subproblema se separa en una mochila por instalación más la elección de instalaciones
+    con la restricción agregada de capacidad. Cualquier valor es una cota inferior válida.
+
+    Args:
+        problem (CFLP): Instancia del problema.
+        multipliers (array): Multiplicador λ_i de cada cliente.
+        forced_open (array): Instalaciones fijadas abiertas (booleanos), opcional.
+        forced_closed (array): Instalaciones fijadas cerradas (booleanos), opcional.
+
+    Returns:
+        tuple: Valor de la cota, subgradiente (1 - fracción atendida de cada cliente) y
+            fracción abierta de cada instalación, o (inf, None, None) si las instalaciones
+            permitidas no cubren la demanda.
+    """
+    values, fractions = knapsack_values(problem.costs - multipliers[:, None], problem.demands, problem.capacities)
+    values += problem.fixed_costs
+    opened = select_facilities(values, problem.capacities, float(problem.demands.sum()), forced_open, forced_closed)
+    if opened is None:
+        return math.inf, None, None
+    bound = float(multipliers.sum() + values @ opened)
+    return bound, 1.0 - fractions @ opened, opened
+
+
+def lagrangian_bound(problem, upper_bound=None, multipliers=None, forced_open=None, forced_closed=None,
+                     max_iterations=300, step_scale=2.0, patience=15, min_step_scale=1e-4, time_limit=None):
+    """
+    Cota inferior por relajación lagrangiana optimizada con subgradiente.
+
+    El paso es el de Polyak, step_scale * (upper_bound - L(λ)) / ||g||², y step_scale se
+    reduce a la mitad tras `patience` iteraciones sin mejorar la cota.
+
+    Args:
+        problem (CFLP): Instancia del problema.
+        upper_bound (float): Costo de una solución factible; por defecto, el de la solución
+            del constructor voraz. Cuanto más cerca del óptimo, mejor es el paso de Polyak.
+        multipliers (array): Multiplicadores iniciales (por defecto, el costo mínimo de cada cliente).
+        forced_open (array): Instalaciones fijadas abiertas (booleanos), opcional.
+        forced_closed (array): Instalaciones fijadas cerradas (booleanos), opcional.
+        max_iterations (int): Iteraciones máximas del subgradiente.
+        step_scale (float): Factor inicial del paso de Polyak.
+        patience (int): Iteraciones sin mejora antes de reducir el paso.
+        min_step_scale (float): Detener cuando el factor del paso baja de este valor.
+        time_limit (float): Tiempo máximo en segundos.
+
+    Returns:
+        tuple: Mejor cota encontrada y sus multiplicadores.
+    """
+    require_dense(problem.costs, "La cota inferior")
+    if upper_bound is None:
+        from constructors import build_solution  # Importación local: evita el ciclo constructors -> solution -> lower_bound.
+        upper_bound = build_solution(problem, "greedy").total_cost
+    if multipliers is None:
+        multipliers = problem.costs.min(axis=1)
+    multipliers = np.array(multipliers, dtype=np.float64)
+
+    start_time = time.perf_counter()
+    best_bound, best_multipliers = -math.inf, multipliers.copy()
+    without_improvement = 0
+    for _ in range(max_iterations):
+        bound, subgradient, _ = lagrangian_value(problem, multipliers, forced_open, forced_closed)
+        if subgradient is None:
+            return math.inf, multipliers
+        if bound > best_bound + EPSILON:
+            best_bound, best_multipliers = bound, multipliers.copy()
+            without_improvement = 0
+        else:
+            without_improvement += 1
+            if without_improvement >= patience:
+                step_scale /= 2
+                without_improvement = 0
+                if step_scale < min_step_scale:
+                    break
+
+        norm = float(subgradient @ subgradient)
+        if norm <= EPSILON or best_bound >= upper_bound - EPSILON:
+            break  # Multiplicadores óptimos o cota que ya iguala a la solución.
+        if time_limit is not None and time.perf_counter() - start_time >= time_limit:
+            break
+        # El objetivo del paso no puede quedar sobre la cota actual (upper_bound puede ser igual).
+        target = max(upper_bound, bound + abs(bound) * 1e-3)
+        multipliers += step_scale * (target - bound) / norm * subgradient
+    return best_bound, best_multipliers
+
+
+def gap_percent(cost, lower_bound):
+    """
+    Brecha certificada en porcentaje: distancia relativa del costo a la cota inferior.
+    """
+    if lower_bound is None or not math.isfinite(cost) or lower_bound <= 0:
+        return None
+    return max(0.0, 100 * (cost - lower_bound) / lower_bound)
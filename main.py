@@ -1,7 +1,10 @@
 import os
 import time
-import matplotlib.pyplot as plt
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from cflp import CFLP
+from solution import set_seed
+from constructors import CONSTRUCTORS
 
 # Valores óptimos para las instancias
 OPTIMOS = {
@@ -51,6 +54,13 @@ CAPACITIES = {
     "capc": [5000, 5750, 6500, 7250],
 }
 
+# Valores óptimos de las instancias especiales, en el mismo orden que CAPACITIES.
+OPTIMOS_ESPECIALES = {
+    "capa": [19240822.449, 18438046.543, 17765201.949, 17160439.012],
+    "capb": [13656379.578, 13361927.449, 13198556.434, 13082516.496],
+    "capc": [11646596.974, 11570340.289, 11518743.744, 11505767.394],
+}
+
 def listar_instancias(carpeta, excluir=[]):
     """
     Lista los archivos en la carpeta, excluyendo los especificados.
@@ -61,18 +71,26 @@ def guardar_resultado(archivo, solucion, tiempo):
     """
     Guarda el resultado de una solución en un archivo de texto.
     """
+    escribir_resultado(archivo, tiempo, solucion.check_solution(), solucion.total_cost)
+
+def escribir_resultado(archivo, tiempo, valida, costo):
+    """
+    Agrega una entrada al archivo de resultados.
+    """
     with open("resultados_solucciones.txt", "a") as f:
         f.write(f"Archivo: {archivo}\n")
         f.write(f"Tiempo: {tiempo:.2f} segundos\n")
-        f.write(f"Solución válida: {solucion.check_solution()}\n")
-        f.write(f"Costo total: {solucion.total_cost}\n")
+        f.write(f"Solución válida: {valida}\n")
+        f.write(f"Costo total: {costo}\n")
         f.write("-" * 40 + "\n")
     print(f"Resultado guardado en 'resultados_solucciones.txt'.")
 
-def comparar_con_optimos(resultados):
+def comparar_con_optimos(resultados, mostrar=True):
     """
     Compara los resultados obtenidos con los valores óptimos y genera un gráfico.
     """
+    import matplotlib.pyplot as plt  # Se importa aquí para no cargarlo en los procesos de trabajo.
+
     diferencias = {res["Instancia"]: res["Costo Total"] - res["Óptimo"] for res in resultados}
     plt.figure(figsize=(10, 6))
     instancias = list(diferencias.keys())
@@ -84,9 +102,130 @@ def comparar_con_optimos(resultados):
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
     plt.savefig("comparacion_costos.png")
-    plt.show()
+    if mostrar:
+        plt.show()
     print("Gráfico guardado como 'comparacion_costos.png'.")
 
+def crear_tareas(carpeta, incluir_especiales=False, semillas=1, semilla_base=None):
+    """
+    Crea la lista de tareas (archivo, índice de capacidad, semilla, repetición) para el modo
+    por lotes. Las instancias especiales se agregan una vez por cada capacidad de CAPACITIES.
+    La repetición (0..semillas-1) distingue las ejecuciones de una instancia aunque no haya semilla.
+    """
+    excluir_especiales = [f"{nombre}.txt" for nombre in CAPACITIES]
+    tareas = []
+    for instancia in sorted(listar_instancias(carpeta, excluir=excluir_especiales)):
+        tareas.append((os.path.join(carpeta, instancia), 0))
+    if incluir_especiales:
+        for nombre, capacidades in CAPACITIES.items():
+            archivo = os.path.join(carpeta, f"{nombre}.txt")
+            if os.path.exists(archivo):
+                tareas.extend((archivo, indice) for indice in range(len(capacidades)))
+
+    # Las instancias más grandes primero, para que la más lenta no quede al final de la cola.
+    tareas.sort(key=lambda tarea: os.path.getsize(tarea[0]), reverse=True)
+    return [
+        (archivo, indice, None if semilla_base is None else semilla_base + k, k)
+        for archivo, indice in tareas
+        for k in range(semillas)
+    ]
+
+def nombre_instancia(archivo, indice_capacidad):
+    """
+    Nombre con que se reporta una instancia; las especiales llevan su capacidad.
+    """
+    nombre = os.path.basename(archivo).split('.')[0]
+    if nombre in CAPACITIES:
+        return f"{nombre}-{CAPACITIES[nombre][indice_capacidad]}"
+    return nombre
+
+def optimo_instancia(archivo, indice_capacidad):
+    """
+    Valor óptimo conocido de una instancia, o None si no se conoce.
+    """
+    nombre = os.path.basename(archivo).split('.')[0]
+    if nombre in OPTIMOS_ESPECIALES:
+        return OPTIMOS_ESPECIALES[nombre][indice_capacidad]
+    return OPTIMOS.get(nombre)
+
+def resolver_tarea(tarea, parametros, carpeta_control=None):
+    """
+    Resuelve una tarea del modo por lotes. Se ejecuta en un proceso de trabajo.
+
+    Con carpeta_control, la búsqueda guarda puntos de control en esa carpeta y, si ya
+    existe uno de la misma tarea (por ejemplo, tras una interrupción), continúa desde él.
+
+    Returns:
+        dict: Resultado de la tarea.
+    """
+    archivo, indice_capacidad, semilla, repeticion = tarea
+    set_seed(semilla)
+    parametros = dict(parametros)
+    if parametros.get("target_gap") is not None and parametros.get("reference_cost") is None:
+        # La brecha objetivo se mide contra el óptimo conocido de la instancia.
+        parametros["reference_cost"] = optimo_instancia(archivo, indice_capacidad)
+        if parametros["reference_cost"] is None:
+            del parametros["target_gap"]
+    if carpeta_control is not None:
+        os.makedirs(carpeta_control, exist_ok=True)
+        # Un archivo por ejecución: sin semilla base todas las repeticiones tienen semilla None.
+        parametros["checkpoint_path"] = os.path.join(
+            carpeta_control, f"{nombre_instancia(archivo, indice_capacidad)}-r{repeticion}-s{semilla}.npz"
+        )
+        parametros["resume"] = True
+    cflp = CFLP(archivo, capacity_index=indice_capacidad)
+    start_time = time.time()
+    best_solution = cflp.simulated_annealing(**parametros)
+    end_time = time.time()
+    return {
+        "Archivo": archivo,
+        "Instancia": nombre_instancia(archivo, indice_capacidad),
+        "Semilla": semilla,
+        "Costo Total": best_solution.total_cost,
+        "Válida": best_solution.check_solution(),
+        "Óptimo": optimo_instancia(archivo, indice_capacidad),
+        "Cota inferior": cflp.run_stats["lower_bound"],
+        "Tiempo (s)": end_time - start_time,
+    }
+
+def resolver_lote(tareas, parametros, procesos=None, mostrar=True, carpeta_control=None):
+    """
+    Resuelve las tareas en paralelo con un conjunto de procesos y compara con los óptimos.
+
+    Args:
+        tareas (list): Tareas creadas con crear_tareas().
+        parametros (dict): Argumentos para CFLP.simulated_annealing.
+        procesos (int): Número de procesos de trabajo (por defecto, uno por núcleo).
+        mostrar (bool): Mostrar el gráfico de comparación al terminar.
+        carpeta_control (str): Carpeta de puntos de control (ver resolver_tarea).
+
+    Returns:
+        list: Resultados de todas las tareas.
+    """
+    resultados = []
+    inicio = time.time()
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = [executor.submit(resolver_tarea, tarea, parametros, carpeta_control) for tarea in tareas]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            print(f"[{len(resultados)}/{len(tareas)}] {resultado['Instancia']}: "
+                  f"{resultado['Costo Total']:.3f} en {resultado['Tiempo (s)']:.2f}s")
+            escribir_resultado(resultado["Archivo"], resultado["Tiempo (s)"], resultado["Válida"], resultado["Costo Total"])
+    print(f"Lote finalizado en {time.time() - inicio:.2f}s")
+
+    # Con varias semillas se compara la mejor solución de cada instancia.
+    mejores = {}
+    for resultado in resultados:
+        if resultado["Óptimo"] is None:
+            continue
+        actual = mejores.get(resultado["Instancia"])
+        if actual is None or resultado["Costo Total"] < actual["Costo Total"]:
+            mejores[resultado["Instancia"]] = resultado
+    if mejores:
+        comparar_con_optimos(sorted(mejores.values(), key=lambda res: res["Instancia"]), mostrar=mostrar)
+    return resultados
+
 def main():
     """
     Menú interactivo para resolver problemas CFLP.
@@ -129,44 +268,24 @@ def main():
             
             print(f"Finalizado en {end_time - start_time:.2f}s")
             print(f"Solution valid: {best_solution.check_solution()}")
+            print(f"Cota inferior: {cflp.lower_bound(best_solution.total_cost)}")
             best_solution.print_solution()
 
             guardar_resultado(file_name, best_solution, end_time - start_time)
 
         elif opcion == "2":
             # Resolver todas las instancias regulares
-            instancias = listar_instancias(carpeta_instancias, excluir=excluir_especiales)
             print("\nResolviendo todas las instancias regulares...")
-            resultados = []
             temperatura = float(input("Temperatura inicial (default 1000): ") or 1000)
             cooling_rate = float(input("Cooling rate (default 0.9995): ") or 0.9995)
             iteraciones = int(input("Iteraciones por temperatura (default 10): ") or 10)
+            procesos = int(input(f"Procesos en paralelo (default {os.cpu_count()}): ") or os.cpu_count())
 
-            for instancia in instancias:
-                file_name = os.path.join(carpeta_instancias, instancia)
-                print(f"Procesando {file_name}...")
-                cflp = CFLP(file_name)
-                start_time = time.time()
-                best_solution = cflp.simulated_annealing(
-                    temperature=temperatura,
-                    cooling_rate=cooling_rate,
-                    iterations=iteraciones
-                )
-                end_time = time.time()
-                
-                guardar_resultado(file_name, best_solution, end_time - start_time)
-
-                instancia_nombre = instancia.split('.')[0]
-                if instancia_nombre in OPTIMOS:
-                    resultados.append({
-                        "Instancia": instancia_nombre,
-                        "Costo Total": best_solution.total_cost,
-                        "Óptimo": OPTIMOS[instancia_nombre],
-                        "Tiempo (s)": end_time - start_time
-                    })
-
-            if resultados:
-                comparar_con_optimos(resultados)
+            resolver_lote(
+                crear_tareas(carpeta_instancias),
+                {"temperature": temperatura, "cooling_rate": cooling_rate, "iterations": iteraciones},
+                procesos=procesos,
+            )
 
         elif opcion == "3":
             # Resolver una instancia especial
@@ -198,6 +317,7 @@ def main():
             
             print(f"Finalizado en {end_time - start_time:.2f}s")
             print(f"Solution valid: {best_solution.check_solution()}")
+            print(f"Cota inferior: {cflp.lower_bound(best_solution.total_cost)}")
             best_solution.print_solution()
 
             guardar_resultado(file_name, best_solution, end_time - start_time)
@@ -225,6 +345,7 @@ def main():
             
             print(f"Finalizado en {end_time - start_time:.2f}s")
             print(f"Solution valid: {best_solution.check_solution()}")
+            print(f"Cota inferior: {cflp.lower_bound(best_solution.total_cost)}")
             best_solution.print_solution()
 
             guardar_resultado(archivo_nombre, best_solution, end_time - start_time)
@@ -237,5 +358,63 @@ def main():
         else:
             print("Opción no válida, intenta de nuevo.")
 
+def parse_args():
+    """
+    Argumentos de línea de comandos; sin --lote se abre el menú interactivo.
+    """
+    parser = argparse.ArgumentParser(description="Resolver instancias CFLP.")
+    parser.add_argument("--lote", action="store_true", help="Resolver todas las instancias sin menú, en paralelo.")
+    parser.add_argument("--carpeta", default="./instances", help="Carpeta con las instancias.")
+    parser.add_argument("--especiales", action="store_true", help="Incluir capa, capb y capc con cada capacidad.")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Número de procesos de trabajo.")
+    parser.add_argument("--semillas", type=int, default=1, help="Ejecuciones por instancia.")
+    parser.add_argument("--semilla-base", type=int, default=None, help="Semilla de la primera ejecución.")
+    parser.add_argument("--temperatura", type=float, default=1000)
+    parser.add_argument("--cooling-rate", type=float, default=0.9995)
+    parser.add_argument("--iteraciones", type=int, default=10)
+    parser.add_argument("--busqueda", choices=["customers", "facilities", "batch"], default="customers",
+                        help="Modo de búsqueda de simulated_annealing.")
+    parser.add_argument("--inicial", choices=sorted(CONSTRUCTORS), default=None,
+                        help="Constructor de la solución inicial.")
+    parser.add_argument("--tiempo-limite", type=float, default=None, help="Segundos máximos por ejecución.")
+    parser.add_argument("--max-evaluaciones", type=int, default=None, help="Vecinos máximos por ejecución.")
+    parser.add_argument("--brecha-objetivo", type=float, default=None,
+                        help="Detener al quedar a este porcentaje del óptimo conocido.")
+    parser.add_argument("--brecha-certificada", type=float, default=None,
+                        help="Detener al quedar a este porcentaje de la cota inferior lagrangiana.")
+    parser.add_argument("--estancamiento", type=int, default=None,
+                        help="Detener tras este número de vecinos sin mejora.")
+    parser.add_argument("--puntos-control", default=None,
+                        help="Carpeta de puntos de control; al repetir el comando se continúan las ejecuciones interrumpidas.")
+    parser.add_argument("--intervalo-control", type=float, default=60, help="Segundos entre puntos de control.")
+    parser.add_argument("--perfil", default=None,
+                        help="Archivo de perfiles de tuning.py; cada instancia usa el de su familia.")
+    parser.add_argument("--sin-grafico", action="store_true", help="Guardar el gráfico sin mostrarlo.")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.lote:
+        resolver_lote(
+            crear_tareas(args.carpeta, incluir_especiales=args.especiales,
+                         semillas=args.semillas, semilla_base=args.semilla_base),
+            {
+                "temperature": args.temperatura,
+                "cooling_rate": args.cooling_rate,
+                "iterations": args.iteraciones,
+                "search": args.busqueda,
+                "initial": args.inicial,
+                "time_limit": args.tiempo_limite,
+                "max_evaluations": args.max_evaluaciones,
+                "target_gap": args.brecha_objetivo,
+                "stagnation": args.estancamiento,
+                "gap_limit": args.brecha_certificada,
+                "checkpoint_interval": args.intervalo_control,
+                "profile": args.perfil,
+            },
+            procesos=args.procesos,
+            mostrar=not args.sin_grafico,
+            carpeta_control=args.puntos_control,
+        )
+    else:
+        main()
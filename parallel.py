@@ -0,0 +1,186 @@
+import math  # Biblioteca para operaciones matemáticas.
+import os  # Número de núcleos disponibles.
+import random  # Criterio de intercambio entre cadenas.
+import time  # Límite de tiempo de la búsqueda.
+import multiprocessing as mp  # Procesos de trabajo y canales de comunicación.
+from cflp import CFLP
+from solution import Solution, set_seed
+
+# Modos de búsqueda en paralelo.
+TEMPERING = "tempering"  # Cadenas a temperaturas fijas que intercambian temperaturas.
+RESTARTS = "restarts"    # Cadenas independientes que reciben la mejor solución global.
+
+
+def _pack(snapshot):
+    """
+    Mensaje compacto con el estado de una solución: asignaciones int32 y estados int8.
+    """
+    return snapshot.customer_result, snapshot.facility_result
+
+
+def _chain_worker(connection, file_path, capacity_index, seed, search, exact_assignment, initial):
+    """
+    Proceso de trabajo: mantiene una cadena de recocido y ejecuta los pasos que pide el coordinador.
+
+    Órdenes recibidas por el canal:
+        ("run", pasos, temperatura, estado o None): ejecuta pasos a esa temperatura, partiendo
+            del estado recibido si se envía uno. Responde (costo actual, mejor costo, mejor estado
+            o None si no mejoró desde el último reporte).
+        ("stop",): termina el proceso.
+    """
+    set_seed(seed)
+    problem = CFLP(file_path, capacity_index=capacity_index)
+    current_solution = problem.initial_solution(search, exact_assignment, initial)
+    best_solution = current_solution.snapshot()
+    evaluated = {}
+    reported_cost = math.inf
+
+    while True:
+        command = connection.recv()
+        if command[0] == "stop":
+            break
+        _, steps, t, state = command
+        if state is not None:
+            current_solution = Solution.from_assignment(problem, *state)
+
+        for _ in range(steps):
+            current_solution = problem.anneal_step(current_solution, t, search, evaluated, exact_assignment)
+            if current_solution.total_cost < best_solution.total_cost:
+                best_solution.update(current_solution)
+
+        improved = best_solution.total_cost < reported_cost
+        reported_cost = min(reported_cost, best_solution.total_cost)
+        connection.send((
+            current_solution.total_cost,
+            best_solution.total_cost,
+            _pack(best_solution) if improved else None,
+        ))
+    connection.close()
+
+
+def parallel_annealing(file_path, capacity_index=0, chains=None, mode=TEMPERING, temperature=1000,
+                       cooling_rate=0.9995, iterations=10, accept_temperature=0.01, exchange_interval=100,
+                       time_limit=None, rounds=None, search="customers", exact_assignment=False, seed=None,
+                       initial=None):
+    """
+    Recocido simulado con varias cadenas en procesos separados.
+
+    En modo TEMPERING cada cadena trabaja a una temperatura fija de una escala geométrica entre
+    temperature y accept_temperature; tras cada intercambio, cadenas de temperaturas vecinas
+    intercambian sus temperaturas con el criterio de Metropolis (solo viajan los costos).
+    En modo RESTARTS todas las cadenas se enfrían con el mismo programa y en cada intercambio
+    la cadena con peor solución actual adopta la mejor solución global.
+
+    Args:
+        file_path (str): Ruta al archivo de datos.
+        capacity_index (int): Índice de capacidad para archivos especiales.
+        chains (int): Número de cadenas (por defecto, uno por núcleo).
+        mode (str): TEMPERING o RESTARTS.
+        temperature (float): Temperatura más alta (o inicial en RESTARTS).
+        cooling_rate (float): Tasa de enfriamiento por cada `iterations` pasos (RESTARTS sin time_limit).
+        iterations (int): Pasos por temperatura (RESTARTS).
+        accept_temperature (float): Temperatura más baja (o final en RESTARTS).
+        exchange_interval (int): Pasos de cada cadena entre intercambios.
+        time_limit (float): Límite de tiempo en segundos; en RESTARTS fija además el enfriamiento.
+        rounds (int): Número máximo de intercambios (por defecto 100 en TEMPERING; en RESTARTS
+            se termina al llegar a accept_temperature).
+        search (str): Modo de búsqueda de cada cadena ("customers", "facilities" o "batch").
+        exact_assignment (bool): Evaluar con el problema de transporte (modo "facilities").
+        seed (int): Semilla base; la cadena k usa seed + k.
+        initial (str): Constructor de la solución inicial de cada cadena (ver constructors.CONSTRUCTORS).
+
+    Returns:
+        Solution: La mejor solución encontrada por todas las cadenas (la mejor de las iniciales
+            si no terminó ningún intercambio).
+    """
+    if mode not in (TEMPERING, RESTARTS):
+        raise ValueError(f"Modo paralelo desconocido: {mode}")
+    chains = chains or os.cpu_count()
+    if mode == TEMPERING and rounds is None and time_limit is None:
+        rounds = 100
+    rng = random.Random(seed)
+
+    problem = CFLP(file_path, capacity_index=capacity_index)
+    connections, processes = [], []
+    for k in range(chains):
+        parent_end, child_end = mp.Pipe()
+        chain_seed = None if seed is None else seed + k
+        process = mp.Process(
+            target=_chain_worker,
+            args=(child_end, file_path, capacity_index, chain_seed, search, exact_assignment, initial),
+            daemon=True,
+        )
+        process.start()
+        child_end.close()
+        connections.append(parent_end)
+        processes.append(process)
+
+    # Escala de temperaturas: ladder[position[k]] es la temperatura de la cadena k.
+    if chains > 1:
+        ladder = [temperature * (accept_temperature / temperature) ** (k / (chains - 1)) for k in range(chains)]
+    else:
+        ladder = [accept_temperature]
+    position = list(range(chains))
+
+    best_cost, best_state = math.inf, None
+    start_time = time.time()
+    round_number = 0
+    t = temperature
+    try:
+        while True:
+            if rounds is not None and round_number >= rounds:
+                break
+            if time_limit is not None and time.time() - start_time >= time_limit:
+                break
+            if mode == RESTARTS and time_limit is not None:
+                # Con límite de tiempo, la temperatura sigue la curva geométrica de simulated_annealing
+                # según el tiempo transcurrido y llega a accept_temperature al agotarse.
+                t = temperature * (accept_temperature / temperature) ** ((time.time() - start_time) / time_limit)
+            elif mode == RESTARTS and t <= accept_temperature:
+                break
+
+            outgoing = [None] * chains
+            if mode == RESTARTS and best_state is not None and round_number > 0:
+                # La cadena con peor solución actual continúa desde la mejor global.
+                outgoing[max(range(chains), key=lambda k: current_costs[k])] = best_state
+
+            for k, connection in enumerate(connections):
+                chain_t = ladder[position[k]] if mode == TEMPERING else t
+                connection.send(("run", exchange_interval, chain_t, outgoing[k]))
+            current_costs = []
+            for connection in connections:
+                current_cost, chain_best_cost, state = connection.recv()
+                current_costs.append(current_cost)
+                if state is not None and chain_best_cost < best_cost:
+                    best_cost, best_state = chain_best_cost, state
+
+            if mode == TEMPERING:
+                # Intercambio de temperaturas entre vecinas, alternando pares pares e impares.
+                chain_at = {position[k]: k for k in range(chains)}
+                for level in range(round_number % 2, chains - 1, 2):
+                    a, b = chain_at[level], chain_at[level + 1]
+                    exponent = (1 / ladder[level] - 1 / ladder[level + 1]) * (current_costs[a] - current_costs[b])
+                    if exponent >= 0 or rng.random() < math.exp(exponent):
+                        position[a], position[b] = position[b], position[a]
+            elif time_limit is None:
+                t *= cooling_rate ** (exchange_interval / iterations)
+            round_number += 1
+
+        if best_state is None:
+            # Ningún intercambio terminó (límite nulo o ya agotado): se usan las soluciones iniciales.
+            for connection in connections:
+                connection.send(("run", 0, t, None))
+            for connection in connections:
+                _, chain_best_cost, state = connection.recv()
+                if state is not None and chain_best_cost < best_cost:
+                    best_cost, best_state = chain_best_cost, state
+    finally:
+        for connection in connections:
+            connection.send(("stop",))
+        for process in processes:
+            process.join()
+
+    if best_state is None:
+        raise ValueError("Ninguna cadena encontró una solución factible.")
+    print(f"Mejor costo en paralelo: {best_cost} ({round_number} intercambios, {time.time() - start_time:.2f}s)")
+    return problem.polish_solution(Solution.from_assignment(problem, *best_state), search)
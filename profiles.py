@@ -0,0 +1,57 @@
+import os  # Nombre base de las instancias.
+import re  # Sufijo numérico de las instancias regulares.
+import json  # Archivo de perfiles.
+
+# Archivo de perfiles por defecto (lo escribe tuning.py).
+PROFILE_PATH = "profiles.json"
+
+# Parámetros de simulated_annealing que puede fijar un perfil.
+TUNABLE = ("temperature", "cooling_rate", "iterations", "accept_temperature", "local_search_size")
+
+
+def instance_family(file_path):
+    """
+    Familia de una instancia: el nombre del archivo sin extensión ni número final
+    ("cap61" -> "cap", "capb" -> "capb").
+    """
+    base_name = os.path.basename(file_path).split('.')[0]
+    return re.sub(r"\d+$", "", base_name) or base_name
+
+
+def read_profiles(path=PROFILE_PATH):
+    """
+    Lee el archivo de perfiles: {familia: {"params": {...}, ...}}. Vacío si no existe.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_profile(family, path=PROFILE_PATH):
+    """
+    Parámetros ajustados de una familia de instancias.
+
+    Returns:
+        dict: Parámetros de TUNABLE guardados para la familia (vacío si no hay perfil).
+    """
+    profile = read_profiles(path).get(family, {})
+    return {key: value for key, value in profile.get("params", {}).items() if key in TUNABLE}
+
+
+def save_profile(family, params, path=PROFILE_PATH, **metadata):
+    """
+    Guarda el perfil de una familia conservando los de las demás.
+
+    Args:
+        family (str): Familia de instancias (ver instance_family).
+        params (dict): Parámetros elegidos.
+        path (str): Archivo de perfiles.
+        **metadata: Información adicional de cómo se obtuvo el perfil.
+    """
+    profiles = read_profiles(path)
+    profiles[family] = {"params": params, **metadata}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,395 @@
+import os  # Fechas de modificación de las instancias.
+import json  # Cuerpos de las peticiones y respuestas.
+import math  # Costos no finitos en las respuestas.
+import time  # Tiempos de las tareas.
+import asyncio  # Servidor y cola de tareas.
+import inspect  # Parámetros aceptados por simulated_annealing.
+import argparse  # Línea de comandos.
+import itertools  # Identificadores de las tareas.
+import multiprocessing as mp  # Estado compartido con los procesos de trabajo.
+from collections import OrderedDict  # Caché LRU de instancias.
+from concurrent.futures import ProcessPoolExecutor
+from cflp import CFLP
+from solution import set_seed
+from instrumentation import SearchTracer
+from benchmark import parse_instance_spec
+
+# Estados de una tarea.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Parámetros de simulated_annealing que se pueden pedir en una tarea. El tracer lo pone el
+# servidor y los puntos de control no tienen sentido para tareas efímeras.
+ANNEALING_PARAMETERS = set(inspect.signature(CFLP.simulated_annealing).parameters) - {
+    "self", "tracer", "checkpoint_path", "checkpoint_interval", "resume",
+}
+
+# Opciones de carga de la instancia (ver CFLP.__init__).
+INSTANCE_OPTIONS = {"nearest", "candidate_size"}
+
+# Instancias ya leídas por el proceso de trabajo: clave -> CFLP, de la menos a la más reciente.
+_instances = OrderedDict()
+_instance_cache_size = 8
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        """
+        Error que se responde al cliente con el código HTTP indicado.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def _init_worker(cache_size):
+    """
+    Inicializa un proceso de trabajo con el tamaño de su caché de instancias.
+    """
+    global _instance_cache_size
+    _instance_cache_size = cache_size
+
+
+def _load_problem(spec):
+    """
+    Instancia de una tarea: los datos enviados en la petición o un archivo, que se guarda
+    en la caché LRU del proceso (la clave incluye la fecha de modificación del archivo).
+    """
+    options = spec.get("options", {})
+    if "data" in spec:
+        data = spec["data"]
+        return CFLP.from_arrays(data["capacities"], data["fixed_costs"], data["demands"], data["costs"],
+                                options.get("candidate_size", 10))
+
+    path, capacity_index = spec["path"], spec["capacity_index"]
+    key = (path, capacity_index, os.path.getmtime(path), tuple(sorted(options.items())))
+    if key in _instances:
+        _instances.move_to_end(key)
+        return _instances[key]
+    problem = CFLP(path, capacity_index=capacity_index, **options)
+    _instances[key] = problem
+    while len(_instances) > _instance_cache_size:
+        _instances.popitem(last=False)
+    return problem
+
+
+def _finite(value):
+    """
+    Valor numérico apto para JSON: None si no es finito.
+    """
+    return value if value is None or math.isfinite(value) else None
+
+
+def _run_job(job_id, spec, progress):
+    """
+    Resuelve una tarea. Se ejecuta en un proceso de trabajo y publica en progress la mejor
+    solución encontrada a medida que mejora.
+
+    Returns:
+        dict: Costo, asignación, instalaciones abiertas, estadísticas y tiempos.
+    """
+    progress[job_id] = {"status": RUNNING, "incumbent": None, "elapsed": 0.0}
+    start_time = time.perf_counter()
+    problem = _load_problem(spec)
+    load_time = time.perf_counter() - start_time
+    if spec.get("seed") is not None:
+        set_seed(spec["seed"])
+
+    best_cost = math.inf
+
+    def report(sample):
+        nonlocal best_cost
+        if sample["best_cost"] < best_cost:
+            best_cost = sample["best_cost"]
+            progress[job_id] = {"status": RUNNING, "incumbent": best_cost, "elapsed": sample["time"]}
+
+    tracer = SearchTracer(sample_interval=spec.get("report_interval", 100), callback=report)
+    solution = problem.simulated_annealing(tracer=tracer, **spec.get("params", {}))
+    return {
+        "cost": solution.total_cost,
+        "valid": solution.check_solution(),
+        "customer_result": solution.customer_result.tolist(),
+        "facility_result": solution.facility_result.tolist(),
+        "run_stats": {key: _finite(value) if isinstance(value, float) else value
+                      for key, value in problem.run_stats.items()},
+        "load_time": load_time,
+        "solve_time": time.perf_counter() - start_time - load_time,
+    }
+
+
+class SolveServer:
+    def __init__(self, processes=None, cache_size=8, folder="./instances", max_finished=100, finished_ttl=3600):
+        """
+        Servidor de resolución: recibe tareas por HTTP, las encola y las reparte entre un
+        grupo de procesos que conservan las instancias ya leídas.
+
+        Args:
+            processes (int): Procesos de trabajo (por defecto, uno por núcleo).
+            cache_size (int): Instancias que guarda cada proceso en su caché LRU.
+            folder (str): Carpeta donde buscar las instancias pedidas por nombre.
+            max_finished (int): Tareas terminadas que se conservan (con su resultado).
+            finished_ttl (float): Segundos que se conserva una tarea terminada (None: sin límite).
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.folder = folder
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.jobs = {}                  # id -> estado de la tarea.
+        self.finished = OrderedDict()   # id -> fecha de término, de la más antigua a la más reciente.
+        self.queue = None               # Tareas pendientes (asyncio.Queue).
+        self.pool = None
+        self.manager = None
+        self.progress = None            # id -> avance publicado por los procesos.
+        self.ids = itertools.count(1)
+        self.dispatchers = []
+
+    async def start(self):
+        """
+        Crea el grupo de procesos y los despachadores de la cola (uno por proceso).
+        """
+        self.manager = mp.Manager()
+        self.progress = self.manager.dict()
+        self.pool = ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=(self.cache_size,))
+        self.queue = asyncio.Queue()
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.processes)]
+
+    async def stop(self):
+        """
+        Detiene los despachadores y el grupo de procesos.
+        """
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.manager.shutdown()
+
+    async def _dispatch(self):
+        """
+        Toma tareas de la cola y las resuelve de a una en el grupo de procesos.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id = await self.queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] == CANCELLED:
+                continue
+            job["status"] = RUNNING
+            job["started"] = time.time()
+            try:
+                job["result"] = await loop.run_in_executor(self.pool, _run_job, job_id, job["spec"], self.progress)
+                job["status"] = DONE
+            except Exception as error:
+                job["status"] = FAILED
+                job["error"] = f"{type(error).__name__}: {error}"
+            self.progress.pop(job_id, None)
+            self._finish(job_id)
+
+    def _finish(self, job_id):
+        """
+        Marca una tarea como terminada y descarta las terminadas que superan el límite de
+        cantidad o de antigüedad, para que los resultados no se acumulen en memoria.
+        """
+        now = time.time()
+        self.jobs[job_id]["finished"] = now
+        self.finished[job_id] = now
+        self._evict(now)
+
+    def _evict(self, now=None):
+        """
+        Descarta las tareas terminadas más antiguas que max_finished o que finished_ttl.
+        """
+        now = time.time() if now is None else now
+        while self.finished:
+            job_id, finished = next(iter(self.finished.items()))
+            expired = self.finished_ttl is not None and now - finished > self.finished_ttl
+            if len(self.finished) <= self.max_finished and not expired:
+                break
+            del self.finished[job_id]
+            del self.jobs[job_id]
+
+    def submit(self, request):
+        """
+        Valida una petición de resolución y la encola.
+
+        Formato (solo una de "instance" o "data"):
+            {"instance": "cap61" | "capa:2" | ruta, "data": {"capacities", "fixed_costs",
+             "demands", "costs"}, "options": {"nearest", "candidate_size"},
+             "params": {argumentos de simulated_annealing}, "seed": int,
+             "report_interval": pasos entre reportes de la mejor solución}
+
+        Returns:
+            str: Identificador de la tarea.
+        """
+        if not isinstance(request, dict) or ("instance" in request) == ("data" in request):
+            raise HTTPError(400, 'Se debe indicar "instance" o "data".')
+        unknown = set(request.get("params", {})) - ANNEALING_PARAMETERS
+        unknown |= set(request.get("options", {})) - INSTANCE_OPTIONS
+        if unknown:
+            raise HTTPError(400, f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+
+        spec = {key: request[key] for key in ("data", "options", "params", "seed", "report_interval") if key in request}
+        if "instance" in request:
+            path, capacity_index = parse_instance_spec(str(request["instance"]), self.folder)[0]
+            if not os.path.exists(path):
+                raise HTTPError(404, f"No existe la instancia {path}")
+            spec["path"], spec["capacity_index"] = path, capacity_index
+        else:
+            missing = {"capacities", "fixed_costs", "demands", "costs"} - set(request["data"])
+            if missing:
+                raise HTTPError(400, f"Faltan datos: {', '.join(sorted(missing))}")
+
+        job_id = str(next(self.ids))
+        self.jobs[job_id] = {
+            "id": job_id,
+            "status": QUEUED,
+            "instance": request.get("instance", "data"),
+            "submitted": time.time(),
+            "spec": spec,
+        }
+        self.queue.put_nowait(job_id)
+        self._evict()
+        return job_id
+
+    def status(self, job_id, include_result=True):
+        """
+        Estado público de una tarea, con la mejor solución parcial si está en curso. Las
+        tareas terminadas se conservan hasta que las descarta _evict.
+        """
+        if job_id not in self.jobs:
+            raise HTTPError(404, f"No existe la tarea {job_id}")
+        job = self.jobs[job_id]
+        status = {key: value for key, value in job.items() if key not in ("spec", "result")}
+        if job["status"] == RUNNING:
+            progress = self.progress.get(job_id, {})
+            status["incumbent"] = progress.get("incumbent")
+            status["elapsed"] = progress.get("elapsed")
+        elif job["status"] == DONE:
+            status["incumbent"] = job["result"]["cost"]
+            if include_result:
+                status["result"] = job["result"]
+        return status
+
+    def cancel(self, job_id):
+        """
+        Cancela una tarea que sigue en la cola; las que ya empezaron no se interrumpen.
+        """
+        status = self.status(job_id, include_result=False)
+        if status["status"] != QUEUED:
+            raise HTTPError(409, f"La tarea {job_id} ya está {status['status']}")
+        self.jobs[job_id]["status"] = CANCELLED
+        status = self.status(job_id)
+        self._finish(job_id)
+        return status
+
+    async def route(self, method, target, body):
+        """
+        Atiende una petición.
+
+        Rutas:
+            POST /jobs           Encola una tarea (ver submit).
+            GET /jobs            Estado de todas las tareas, sin resultados.
+            GET /jobs/<id>       Estado de una tarea y su resultado si terminó.
+            DELETE /jobs/<id>    Cancela una tarea en cola.
+
+        Returns:
+            tuple: Código HTTP y cuerpo de la respuesta.
+        """
+        parts = [part for part in target.split("?")[0].split("/") if part]
+        if parts[:1] != ["jobs"] or len(parts) > 2:
+            raise HTTPError(404, f"Ruta desconocida: {target}")
+        if len(parts) == 1:
+            if method == "POST":
+                try:
+                    request = json.loads(body or b"{}")
+                except ValueError as error:
+                    raise HTTPError(400, f"JSON inválido: {error}")
+                return 202, {"id": self.submit(request)}
+            if method == "GET":
+                self._evict()
+                return 200, {"jobs": [self.status(job_id, include_result=False) for job_id in self.jobs]}
+        else:
+            if method == "GET":
+                return 200, self.status(parts[1])
+            if method == "DELETE":
+                return 200, self.cancel(parts[1])
+        raise HTTPError(405, f"Método no permitido: {method} {target}")
+
+    async def handle(self, reader, writer):
+        """
+        Lee una petición HTTP/1.1, la atiende y cierra la conexión.
+        """
+        try:
+            try:
+                method, target, _ = (await reader.readline()).decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1").strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.route(method, target, body)
+            except HTTPError as error:
+                status, payload = error.status, {"error": str(error)}
+            except ValueError as error:
+                status, payload = 400, {"error": f"Petición inválida: {error}"}
+            data = json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, socket_path=None, processes=None, cache_size=8, folder="./instances",
+                max_finished=100, finished_ttl=3600):
+    """
+    Ejecuta el servidor hasta que se interrumpa, escuchando en host:port o en un socket Unix.
+    """
+    server = SolveServer(processes, cache_size, folder, max_finished, finished_ttl)
+    await server.start()
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path)
+        address = socket_path
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        address = f"http://{host}:{port}"
+    print(f"Servidor escuchando en {address} con {server.processes} procesos.")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Servidor local de resolución de instancias CFLP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar.")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto HTTP.")
+    parser.add_argument("--socket", default=None, help="Escuchar en este socket Unix en vez de TCP.")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos de trabajo (por defecto, uno por núcleo).")
+    parser.add_argument("--cache-instancias", type=int, default=8, help="Instancias guardadas por proceso.")
+    parser.add_argument("--carpeta", default="./instances", help="Carpeta con las instancias pedidas por nombre.")
+    parser.add_argument("--max-terminadas", type=int, default=100,
+                        help="Tareas terminadas que se conservan; las más antiguas se descartan.")
+    parser.add_argument("--retencion", type=float, default=3600,
+                        help="Segundos que se conserva una tarea terminada con su resultado.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.puerto, args.socket, args.procesos, args.cache_instancias, args.carpeta,
+                          args.max_terminadas, args.retencion))
+    except KeyboardInterrupt:
+        pass
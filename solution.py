@@ -1,8 +1,41 @@
 import random
 import time 
+import numpy as np
+from lower_bound import gap_percent
+from assignment import repair_assignment
 
 # Configurar la semilla del generador de números aleatorios basada en el tiempo actual.
 random.seed(time.time())
+np_random = np.random.default_rng(random.getrandbits(64))
+
+
+def set_seed(seed):
+    """
+    Fija la semilla de los generadores aleatorios (random y NumPy) usados por el solver.
+
+    Args:
+        seed (int): Semilla; None usa entropía del sistema operativo.
+    """
+    global np_random
+    random.seed(seed)
+    np_random = np.random.default_rng(random.getrandbits(64))
+
+
+def get_rng_state():
+    """
+    Estado de los generadores aleatorios del solver, serializable como JSON.
+    """
+    version, internal_state, gauss_next = random.getstate()
+    return {"random": [version, list(internal_state), gauss_next], "numpy": np_random.bit_generator.state}
+
+
+def set_rng_state(state):
+    """
+    Restaura el estado guardado con get_rng_state().
+    """
+    version, internal_state, gauss_next = state["random"]
+    random.setstate((version, tuple(internal_state), gauss_next))
+    np_random.bit_generator.state = state["numpy"]
 
 # Clase que representa el costo de asignar un cliente a una instalación específica.
 class CustomerCost:
@@ -24,28 +57,425 @@ class Facility:
 
 
 
+def _pick_facilities(costs, feasible, current_costs, accept_probability=0.2):
+    """
+    Regla de elección de local_search aplicada fila por fila: se recorren las columnas
+    factibles en orden y cada una reemplaza a la elegida si es más barata o, con
+    probabilidad accept_probability, aunque no lo sea.
+
+    Args:
+        costs (array): Costos de cada fila (cliente) y columna (instalación).
+        feasible (array): Columnas factibles de cada fila.
+        current_costs (array): Costo actual de cada cliente.
+        accept_probability (float): Probabilidad de aceptar una columna más cara.
+
+    Returns:
+        array: Columna elegida por fila, o -1 si el cliente se queda donde está.
+    """
+    rows = np.arange(len(costs))
+    accepted = feasible & (np_random.random(feasible.shape) < accept_probability)
+
+    # Sin aceptaciones al azar: la columna factible más barata si mejora la actual.
+    masked_costs = np.where(feasible, costs, np.inf)
+    best = masked_costs.argmin(axis=1)
+    best = np.where(masked_costs[rows, best] < current_costs, best, -1)
+
+    # Con aceptaciones al azar: la más barata desde la última columna aceptada.
+    has_accepted = accepted.any(axis=1)
+    last_accepted = feasible.shape[1] - 1 - accepted[:, ::-1].argmax(axis=1)
+    columns = np.arange(feasible.shape[1])
+    tail_costs = np.where(feasible & (columns[None, :] >= last_accepted[:, None]), costs, np.inf)
+    return np.where(has_accepted, tail_costs.argmin(axis=1), best)
+
+
+# Tipos de movimiento que entiende el motor de vecindario.
+# Un movimiento es una tupla: (MOVE_REASSIGN, cliente, instalación),
+# (MOVE_OPEN, instalación) o (MOVE_CLOSE, instalación).
+MOVE_REASSIGN = "reassign"
+MOVE_OPEN = "open"
+MOVE_CLOSE = "close"
+
+
+class MoveBatch:
+    __slots__ = ("deltas", "customers", "partners", "targets", "sources", "opened", "counts", "structural")
+
+    def __init__(self, deltas, customers, partners, targets, sources, opened, counts, structural):
+        """
+        Lote de movimientos evaluados por Solution.batch_moves().
+
+        Los primeros len(customers) movimientos son reasignaciones (partners == -1: el
+        cliente pasa de sources a targets) o intercambios (el cliente y su pareja cambian de
+        instalación entre sí); los siguientes son cierres y aperturas con reasignación,
+        guardados ya como listas de movimientos.
+
+        Args:
+            deltas (array): Cambio de costo de cada movimiento (inf si no es factible).
+            customers (array): Cliente que se mueve.
+            partners (array): Cliente con el que se intercambia, o -1.
+            targets (array): Instalación de destino del cliente.
+            sources (array): Instalación actual del cliente.
+            opened (array): Instalaciones abiertas al generar el lote.
+            counts (array): Clientes por instalación al generar el lote.
+            structural (list): Pares (movimientos, instalaciones afectadas) de los cierres y aperturas.
+        """
+        self.deltas = deltas
+        self.customers = customers
+        self.partners = partners
+        self.targets = targets
+        self.sources = sources
+        self.opened = opened
+        self.counts = counts
+        self.structural = structural
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def moves(self, index):
+        """
+        Movimientos (ver MOVE_REASSIGN, MOVE_OPEN, MOVE_CLOSE) del elemento index del lote.
+        """
+        if index >= len(self.customers):
+            return self.structural[index - len(self.customers)][0]
+        customer_id, target, source = int(self.customers[index]), int(self.targets[index]), int(self.sources[index])
+        if self.partners[index] >= 0:
+            return [(MOVE_REASSIGN, customer_id, target), (MOVE_REASSIGN, int(self.partners[index]), source)]
+        moves = [(MOVE_REASSIGN, customer_id, target)]
+        if not self.opened[target]:
+            moves.append((MOVE_OPEN, target))
+        if self.counts[source] == 1:
+            moves.append((MOVE_CLOSE, source))
+        return moves
+
+    def facilities(self, index):
+        """
+        Instalaciones cuya carga o estado cambia con el elemento index del lote.
+        """
+        if index >= len(self.customers):
+            return self.structural[index - len(self.customers)][1]
+        return (int(self.targets[index]), int(self.sources[index]))
+
+
+# Movimientos de clientes por vecino (mínimo y máximo) y proporción de reasignaciones,
+# intercambios y cadenas de expulsión en neighbor_moves().
+NEIGHBOR_MOVES = (1, 3)
+NEIGHBOR_WEIGHTS = (0.6, 0.2, 0.2)
+
+# Probabilidad de que un vecino cierre además una instalación.
+CLOSE_PROBABILITY = 0.2
+
+# Intentos de muestreo antes de recorrer todas las opciones.
+SAMPLE_ATTEMPTS = 8
+
+
+class _PendingMoves:
+    """
+    Movimientos de un vecino en construcción y el estado pendiente (cargas, asignaciones,
+    clientes por instalación e instalaciones abiertas) de lo que tocan, sin modificar la
+    solución. Las consultas de capacidad y de conteos son O(1) sobre ese estado y sobre los
+    que mantiene la solución (Solution.facility_counts y Solution.members).
+    """
+
+    def __init__(self, solution):
+        self.solution = solution
+        self.problem = solution.problem
+        self.demands = self.problem.demands
+        self.candidates = self.problem.candidates
+        self.moves = []
+        self.spare = {}     # Capacidad libre pendiente de las instalaciones tocadas.
+        self.assigned = {}  # Asignaciones pendientes de los clientes tocados.
+        self.counts = {}    # Clientes pendientes de las instalaciones tocadas.
+        self.opened = {}    # Estados pendientes de las instalaciones tocadas.
+
+    def free(self, facility_id):
+        return self.spare.get(facility_id, self.solution.spare_capacity[facility_id])
+
+    def count(self, facility_id):
+        return self.counts.get(facility_id, self.solution.facility_counts[facility_id])
+
+    def is_open(self, facility_id):
+        return self.opened.get(facility_id, self.solution.facility_result[facility_id]) == 1
+
+    def facility_of(self, customer_id):
+        return self.assigned.get(customer_id, int(self.solution.customer_result[customer_id]))
+
+    def members(self, facility_id):
+        """
+        Clientes asignados a una instalación en el estado pendiente (ver Solution.members).
+        """
+        members = self.solution.members(facility_id)
+        if self.assigned:
+            members = [c for c in members.tolist() if c not in self.assigned]
+            members += [c for c, f in self.assigned.items() if f == facility_id]
+            members = np.array(members, dtype=np.int64)
+        return members
+
+    def reassign(self, customer_id, facility_id):
+        """
+        Agrega la reasignación de un cliente, abriendo el destino si estaba cerrado y
+        cerrando el origen si queda vacío. No revisa la capacidad.
+        """
+        source = self.facility_of(customer_id)
+        demand = self.demands[customer_id]
+        self.spare[source] = self.free(source) + demand
+        self.spare[facility_id] = self.free(facility_id) - demand
+        self.counts[source] = self.count(source) - 1
+        self.counts[facility_id] = self.count(facility_id) + 1
+        self.assigned[customer_id] = facility_id
+        self.moves.append((MOVE_REASSIGN, customer_id, facility_id))
+        if not self.is_open(facility_id):
+            self.opened[facility_id] = 1
+            self.moves.append((MOVE_OPEN, facility_id))
+        if self.counts[source] == 0:
+            self.opened[source] = 0
+            self.moves.append((MOVE_CLOSE, source))
+
+    def random_candidate(self, customer_id, exclude):
+        """
+        Candidata al azar del cliente distinta de exclude (None si el muestreo no la encuentra).
+        """
+        for _ in range(SAMPLE_ATTEMPTS):
+            facility_id = int(self.candidates[customer_id, random.randrange(self.candidates.shape[1])])
+            if facility_id != exclude:
+                return facility_id
+        return None
+
+    def try_reassign(self, customer_id):
+        """
+        Reasigna el cliente a una candidata con capacidad libre: primero por rechazo, luego
+        sobre todas las candidatas y, si ninguna tiene espacio, sobre la lista completa.
+        """
+        demand = self.demands[customer_id]
+        current = self.facility_of(customer_id)
+        customer_candidates = self.candidates[customer_id]
+        for _ in range(SAMPLE_ATTEMPTS):
+            facility_id = int(customer_candidates[random.randrange(len(customer_candidates))])
+            if facility_id != current and demand <= self.free(facility_id):
+                self.reassign(customer_id, facility_id)
+                return True
+
+        feasible = self.solution.spare_capacity >= demand
+        for facility_id, capacity in self.spare.items():
+            feasible[facility_id] = capacity >= demand
+        feasible[current] = False
+        feasible &= np.isfinite(self.problem.costs[customer_id])
+        options = customer_candidates[feasible[customer_candidates]]
+        if len(options) == 0:
+            options = np.flatnonzero(feasible)
+        if len(options) == 0:
+            return False
+        self.reassign(customer_id, int(options[random.randrange(len(options))]))
+        return True
+
+    def try_swap(self, customer_id):
+        """
+        Intercambia el cliente con otro asignado a una de sus candidatas, si ambos caben.
+        """
+        current = self.facility_of(customer_id)
+        facility_id = self.random_candidate(customer_id, current)
+        if facility_id is None or self.count(facility_id) == 0:
+            return False
+        demand = self.demands[customer_id]
+        members = self.members(facility_id)
+        other_demands = self.demands[members]
+        # El otro cliente debe liberar lo que le falta al primero y caber en su lugar.
+        fits = (other_demands >= demand - self.free(facility_id)) & (other_demands <= self.free(current) + demand)
+        options = members[fits]
+        options = options[np.isfinite(self.problem.costs[options, current])]
+        if len(options) == 0:
+            return False
+        other = int(options[random.randrange(len(options))])
+        self.reassign(customer_id, facility_id)
+        self.reassign(other, current)
+        return True
+
+    def try_ejection_chain(self, customer_id):
+        """
+        El cliente entra a una candidata y expulsa a uno de sus clientes, que libera lo
+        necesario, hacia una candidata propia con espacio (que puede ser la instalación
+        que dejó el primero).
+        """
+        current = self.facility_of(customer_id)
+        facility_id = self.random_candidate(customer_id, current)
+        if facility_id is None or self.count(facility_id) == 0:
+            return False
+        demand = self.demands[customer_id]
+        members = self.members(facility_id)
+        options = members[self.demands[members] >= demand - self.free(facility_id)]
+        if len(options) == 0:
+            return False
+        ejected = int(options[random.randrange(len(options))])
+        ejected_demand = self.demands[ejected]
+        for _ in range(SAMPLE_ATTEMPTS):
+            target = self.random_candidate(ejected, facility_id)
+            if target is None:
+                break
+            available = self.free(target) + (demand if target == current else 0)
+            if ejected_demand <= available:
+                self.reassign(customer_id, facility_id)
+                self.reassign(ejected, target)
+                return True
+        return False
+
+    def try_close(self):
+        """
+        Cierra una instalación abierta al azar llevando cada uno de sus clientes (de mayor a
+        menor demanda) a la instalación abierta más barata con espacio, buscando primero
+        entre sus candidatas. Si alguno no cabe, no se cierra.
+        """
+        num_facilities = self.problem.num_facilities
+        facility_id = next((f for f in (random.randrange(num_facilities) for _ in range(SAMPLE_ATTEMPTS))
+                            if self.is_open(f)), None)
+        if facility_id is None:
+            # Pocas abiertas: elegir sobre la lista completa.
+            open_ids = self.open_facilities()
+            if not open_ids:
+                return False
+            facility_id = open_ids[random.randrange(len(open_ids))]
+        members = self.members(facility_id)
+        members = members[np.argsort(-self.demands[members], kind="stable")]
+        costs = self.problem.costs
+        others = None  # Todas las demás abiertas; solo se arma si alguna candidata no alcanza.
+
+        spare = {}
+        targets = []
+        for customer_id in members.tolist():
+            demand = self.demands[customer_id]
+            options = [f for f in self.candidates[customer_id].tolist() if f != facility_id and self.is_open(f)]
+            target = next((f for f in options if demand <= spare.get(f, self.free(f))), None)
+            if target is None:
+                if others is None:
+                    others = np.array([f for f in self.open_facilities() if f != facility_id], dtype=np.int64)
+                row = costs[customer_id, others]
+                allowed = np.flatnonzero(np.isfinite(row))
+                order = others[allowed[np.argsort(row[allowed])]]
+                target = next((f for f in order.tolist() if demand <= spare.get(f, self.free(f))), None)
+            if target is None:
+                return False
+            spare[target] = spare.get(target, self.free(target)) - demand
+            targets.append(target)
+
+        for customer_id, target in zip(members.tolist(), targets):
+            self.reassign(customer_id, target)
+        return True
+
+    def open_facilities(self):
+        """
+        Instalaciones abiertas en el estado pendiente (recorre todas las instalaciones).
+        """
+        open_ids = [f for f in np.flatnonzero(self.solution.facility_result).tolist() if self.is_open(f)]
+        return open_ids + [f for f, state in self.opened.items() if state and not self.solution.facility_result[f]]
+
+
 # Clase principal que representa una solución al problema.
 class Solution:
-    def __init__(self, facilities, customers):
-        self.facilities = facilities  # Lista de instalaciones disponibles.
-        self.customers = customers    # Lista de clientes que necesitan ser atendidos.
+    __slots__ = ("problem", "total_cost", "facility_result", "customer_result", "spare_capacity", "facility_counts",
+                 "_members", "_shared")
+
+    def __init__(self, problem):
+        self.problem = problem        # Instancia CFLP con los vectores y la matriz de costos.
         self.total_cost = 0           # Costo total de la solución.
-        self.facility_result = [0] * len(facilities)  # Estado de cada instalación (0: cerrada, 1: abierta).
-        self.customer_result = [-1] * len(customers)  # Asignación de cada cliente a una instalación.
-        self.spare_capacity = [{"id": i, "capacity": facilities[i]['capacity']} for i in range(len(facilities))]
-        self.facility_sequence = list(range(len(facilities)))  # Secuencia de instalaciones.
-        self.customer_sequence = list(range(len(customers)))  # Secuencia de clientes.
+        self.facility_result = np.zeros(problem.num_facilities, dtype=np.int8)  # Estado de cada instalación (0: cerrada, 1: abierta).
+        self.customer_result = np.full(problem.num_customers, -1, dtype=np.int32)  # Asignación de cada cliente a una instalación.
+        self.spare_capacity = problem.capacities.copy()  # Capacidad libre de cada instalación.
+        self.facility_counts = np.zeros(problem.num_facilities, dtype=np.int64)  # Clientes de cada instalación.
+        self._members = None          # Conjuntos de clientes por instalación, al primer uso (ver members).
+        self._shared = False          # Los arreglos se comparten con otra solución (ver copy).
 
         # Generar una solución inicial aleatoria.
         self.random_generate()
         # Calcular el costo total de la solución inicial.
         self.calculate_total_cost()
 
+    @classmethod
+    def from_assignment(cls, problem, customer_result, facility_result=None):
+        """
+        Construye una solución a partir de un arreglo de asignaciones.
+
+        Args:
+            problem (CFLP): Instancia del problema.
+            customer_result (array): Instalación asignada a cada cliente.
+            facility_result (array, optional): Estado de cada instalación. Si se omite,
+                se abren exactamente las instalaciones que tienen clientes.
+        """
+        solution = cls.__new__(cls)
+        solution.problem = problem
+        solution._shared = False
+        solution._members = None
+        solution.customer_result = np.array(customer_result, dtype=np.int32)
+        solution.facility_counts = np.bincount(solution.customer_result, minlength=problem.num_facilities)
+        if facility_result is None:
+            facility_result = solution.facility_counts > 0
+        solution.facility_result = np.array(facility_result, dtype=np.int8)
+        solution.spare_capacity = problem.capacities - np.bincount(
+            solution.customer_result, weights=problem.demands, minlength=problem.num_facilities
+        )
+        solution.calculate_total_cost()
+        return solution
+
+    def copy(self):
+        """
+        Devuelve una copia de la solución sin volver a generarla. La copia comparte los
+        arreglos con el original hasta que alguno de los dos los modifica (ver _own).
+        """
+        clone = Solution.__new__(Solution)
+        clone.problem = self.problem
+        clone.total_cost = self.total_cost
+        clone.facility_result = self.facility_result
+        clone.customer_result = self.customer_result
+        clone.spare_capacity = self.spare_capacity
+        clone.facility_counts = self.facility_counts
+        clone._members = self._members
+        clone._shared = self._shared = True
+        return clone
+
+    def _own(self):
+        """
+        Copia los arreglos si están compartidos, antes de modificarlos en el lugar.
+        """
+        if self._shared:
+            self.facility_result = self.facility_result.copy()
+            self.customer_result = self.customer_result.copy()
+            self.spare_capacity = self.spare_capacity.copy()
+            self.facility_counts = self.facility_counts.copy()
+            self._members = None  # Se reconstruyen al próximo uso.
+            self._shared = False
+
+    def members(self, facility_id):
+        """
+        Clientes asignados a una instalación, en orden creciente. Los conjuntos por instalación
+        se construyen la primera vez (O(n)) y después se mantienen en apply_move, rollback y
+        local_search, así que cada consulta cuesta lo que la instalación tiene.
+        """
+        if self._members is None:
+            self._members = [set() for _ in range(self.problem.num_facilities)]
+            for customer_id, assigned in enumerate(self.customer_result.tolist()):
+                self._members[assigned].add(customer_id)
+        return np.array(sorted(self._members[facility_id]), dtype=np.int64)
+
+    def _move_customers(self, customer_ids, sources, targets):
+        """
+        Actualiza los conteos y conjuntos de clientes por instalación tras reasignar los
+        clientes de sources a targets (listas del mismo largo, sin repetir clientes).
+        """
+        num_facilities = self.problem.num_facilities
+        self.facility_counts += np.bincount(targets, minlength=num_facilities) - np.bincount(sources, minlength=num_facilities)
+        if self._members is not None:
+            for customer_id, source, target in zip(customer_ids, sources, targets):
+                self._members[source].discard(customer_id)
+                self._members[target].add(customer_id)
+
+    def snapshot(self):
+        """
+        Copia compacta de la solución (asignaciones y costo), para guardar la mejor
+        solución de una búsqueda o conjuntos grandes de soluciones.
+        """
+        return SolutionSnapshot(self)
+
     def log_spare_capacity(self, message=""):
         print(f"{message}")
         for i, spare in enumerate(self.spare_capacity):
             print(f"Instalación {i}: Capacidad libre {spare}, "
-                f"Capacidad máxima {self.facilities[i]['capacity']}, "
+                f"Capacidad máxima {self.problem.capacities[i]}, "
                 f"Estado abierto: {self.facility_result[i]}")
         print("-" * 50)
 
@@ -55,116 +485,440 @@ class Solution:
         Genera una solución inicial asignando clientes a instalaciones
         de manera aleatoria pero considerando costos.
         """
-        for facility_id in range(len(self.facilities)):
-            self.facility_result[facility_id] = 0
-            self.spare_capacity[facility_id] = self.facilities[facility_id]['capacity']
+        self._own()
+        demands = self.problem.demands
+        costs = self.problem.costs
+        candidates = self.problem.candidates
+        self.facility_result[:] = 0
+        self.spare_capacity[:] = self.problem.capacities
 
-        random.shuffle(self.customer_sequence)
+        # Orden de preferencia de cada cliente entre sus candidatas: costo más un ruido aleatorio.
+        noisy_costs = costs[np.arange(len(demands))[:, None], candidates] + np_random.uniform(0, 10, size=candidates.shape)
+        prioritized_facilities = np.take_along_axis(candidates, np.argsort(noisy_costs, axis=1), axis=1).tolist()
 
-        for customer_id in self.customer_sequence:
-            prioritized_facilities = sorted(
-                self.facility_sequence,
-                key=lambda f_id: self.customers[customer_id]['costs'][f_id] + random.uniform(0, 10)
-            )
-            for facility_id in prioritized_facilities:
-                if self.customers[customer_id]['demand'] <= self.spare_capacity[facility_id]:
-                    self.spare_capacity[facility_id] -= self.customers[customer_id]['demand']
-                    self.customer_result[customer_id] = facility_id
-                    self.facility_result[facility_id] = 1
+        customer_sequence = list(range(len(demands)))
+        random.shuffle(customer_sequence)
+
+        spare = self.spare_capacity.tolist()
+        overloaded = False
+        for customer_id in customer_sequence:
+            demand = demands[customer_id]
+            for facility_id in prioritized_facilities[customer_id]:
+                if demand <= spare[facility_id]:
                     break
             else:
-                raise ValueError(f"No se puede asignar al cliente {customer_id}, demanda excede la capacidad disponible.")
+                # Ninguna candidata tiene espacio: recorrer todas las instalaciones por costo.
+                row = costs[customer_id]
+                for facility_id in np.argsort(row).tolist():
+                    if demand <= spare[facility_id] and np.isfinite(row[facility_id]):
+                        break
+                else:
+                    # Con costos dispersos puede no quedar ninguna permitida con espacio: se
+                    # sobrecarga la más barata y se corrige al final.
+                    facility_id = int(candidates[customer_id, 0])
+                    overloaded = True
+            spare[facility_id] -= demand
+            self.customer_result[customer_id] = facility_id
+
+        if overloaded:
+            if not repair_assignment(self.problem, self.customer_result, np.ones(len(spare), dtype=bool)):
+                raise ValueError("No se puede asignar a todos los clientes, la demanda excede la capacidad disponible "
+                                 "(con nearest, la de las instalaciones permitidas de cada cliente; pruebe un valor mayor).")
+            spare = self.problem.capacities - np.bincount(self.customer_result, weights=demands, minlength=len(spare))
+        self.facility_result[self.customer_result] = 1
+        self.spare_capacity[:] = spare
+        self.facility_counts = np.bincount(self.customer_result, minlength=len(spare))
+        self._members = None
 
     def calculate_total_cost(self):
         """
         Calcula el costo total de la solución, considerando costos fijos y variables.
         """
-        self.total_cost = 0  # Reiniciar el costo total.
-        # Sumar costos fijos de las instalaciones abiertas.
-        for facility_id, is_open in enumerate(self.facility_result):
-            if is_open:
-                self.total_cost += self.facilities[facility_id]['fixed_cost']
-
-        # Sumar los costos de asignación de cada cliente.
-        for customer_id, facility_id in enumerate(self.customer_result):
-            self.total_cost += self.customers[customer_id]['costs'][facility_id]
+        problem = self.problem
+        fixed = problem.fixed_costs[self.facility_result == 1].sum()
+        assignment = problem.costs[np.arange(problem.num_customers), self.customer_result].sum()
+        self.total_cost = float(fixed + assignment)
 
     def check_solution(self):
         """
         Verifica que ninguna instalación exceda su capacidad máxima.
         """
-        # Inicializar el uso de capacidad de cada instalación.
-        used_capacity = [0] * len(self.facilities)
-        for customer_id, facility_id in enumerate(self.customer_result):
-            used_capacity[facility_id] += self.customers[customer_id]['demand']
+        used_capacity = np.bincount(
+            self.customer_result, weights=self.problem.demands, minlength=self.problem.num_facilities
+        )
+        return bool(np.all(used_capacity <= self.problem.capacities))
 
-        # Verificar que el uso de capacidad no exceda el límite en ninguna instalación.
-        for i, facility in enumerate(self.facilities):
-            if used_capacity[i] > facility['capacity']:
-                return False
-        return True
+    def apply_move(self, move):
+        """
+        Aplica un movimiento en el lugar actualizando cargas y costo total.
+
+        Returns:
+            tuple: Movimiento inverso, o None si el movimiento no cambió nada.
+        """
+        self._own()
+        if move[0] == MOVE_REASSIGN:
+            _, customer_id, facility_id = move
+            current_facility = int(self.customer_result[customer_id])
+            if current_facility == facility_id:
+                return None
+            demand = self.problem.demands[customer_id]
+            costs = self.problem.costs
+            self.spare_capacity[current_facility] += demand
+            self.spare_capacity[facility_id] -= demand
+            self.customer_result[customer_id] = facility_id
+            self.facility_counts[current_facility] -= 1
+            self.facility_counts[facility_id] += 1
+            if self._members is not None:
+                self._members[current_facility].discard(customer_id)
+                self._members[facility_id].add(customer_id)
+            self.total_cost += costs[customer_id, facility_id] - costs[customer_id, current_facility]
+            return (MOVE_REASSIGN, customer_id, current_facility)
+
+        facility_id = move[1]
+        target = 1 if move[0] == MOVE_OPEN else 0
+        if self.facility_result[facility_id] == target:
+            return None
+        fixed_cost = self.problem.fixed_costs[facility_id]
+        self.facility_result[facility_id] = target
+        self.total_cost += fixed_cost if target else -fixed_cost
+        return (MOVE_CLOSE, facility_id) if target else (MOVE_OPEN, facility_id)
+
+    def apply_moves(self, moves):
+        """
+        Aplica una lista de movimientos en el lugar.
+
+        Returns:
+            list: Registro para deshacer los movimientos con rollback().
+        """
+        undo = []
+        for move in moves:
+            inverse = self.apply_move(move)
+            if inverse is not None:
+                undo.append(inverse)
+        return undo
+
+    def rollback(self, undo):
+        """
+        Deshace los movimientos registrados por apply_moves() o local_search().
+        """
+        self._own()
+        if len(undo) <= 4:
+            for move in reversed(undo):
+                self.apply_move(move)
+            return
+
+        # Restaurar de una vez: el primer registro de cada cliente o instalación es su estado
+        # original. Solo se tocan los clientes e instalaciones del registro.
+        problem = self.problem
+        original, states = {}, {}
+        for move in undo:
+            if move[0] == MOVE_REASSIGN:
+                original.setdefault(move[1], move[2])
+            else:
+                states.setdefault(move[1], 1 if move[0] == MOVE_OPEN else 0)
+        if original:
+            customer_ids = np.fromiter(original, dtype=np.int64, count=len(original))
+            targets = np.fromiter(original.values(), dtype=np.int64, count=len(original))
+            sources = self.customer_result[customer_ids].astype(np.int64)
+            demands = problem.demands[customer_ids]
+            np.add.at(self.spare_capacity, sources, demands)
+            np.subtract.at(self.spare_capacity, targets, demands)
+            self.total_cost += float(problem.costs[customer_ids, targets].sum() - problem.costs[customer_ids, sources].sum())
+            self.customer_result[customer_ids] = targets
+            self._move_customers(customer_ids.tolist(), sources, targets)
+        for facility_id, state in states.items():
+            if self.facility_result[facility_id] != state:
+                self.facility_result[facility_id] = state
+                self.total_cost += problem.fixed_costs[facility_id] if state else -problem.fixed_costs[facility_id]
+
+    def neighbor_moves(self):
+        """
+        Genera los movimientos de una solución vecina, sin modificar la solución: entre
+        NEIGHBOR_MOVES movimientos de clientes y, con probabilidad CLOSE_PROBABILITY, el cierre
+        de una instalación con la reubicación de todos sus clientes.
+
+        Cada movimiento de clientes es, según NEIGHBOR_WEIGHTS, una reasignación a una
+        candidata con capacidad libre, un intercambio de dos clientes entre sus
+        instalaciones o una cadena de expulsión (el cliente entra a una candidata sin
+        espacio y desplaza a otro cliente hacia una tercera instalación). La factibilidad se
+        revisa en tiempo constante contra las cargas pendientes; una instalación se abre al
+        recibir su primer cliente y se cierra al quedar vacía.
+
+        Returns:
+            list: Movimientos que describen al vecino.
+        """
+        pending = _PendingMoves(self)
+        num_customers = self.problem.num_customers
+        reassign_weight, swap_weight, _ = NEIGHBOR_WEIGHTS
+        for _ in range(random.randint(*NEIGHBOR_MOVES)):
+            customer_id = random.randint(0, num_customers - 1)
+            draw = random.random()
+            if draw < reassign_weight:
+                pending.try_reassign(customer_id)
+            elif draw < reassign_weight + swap_weight:
+                pending.try_swap(customer_id)
+            else:
+                pending.try_ejection_chain(customer_id)
+        if random.random() < CLOSE_PROBABILITY:
+            pending.try_close()
+        return pending.moves
 
-    def generate_neighbor(self):
+    def batch_moves(self, batch_size=256, structural=2):
         """
-        Genera una solución vecina modificando varias asignaciones de clientes y estados de instalaciones.
+        Genera y evalúa de una vez un lote de movimientos, sin modificar la solución:
+        reasignaciones de un cliente a una de sus candidatas, intercambios de dos clientes
+        entre sus instalaciones y, además, `structural` cierres y `structural` aperturas de
+        instalaciones con reasignación de sus clientes.
+
+        Una instalación se abre al recibir su primer cliente y se cierra al quedar vacía, así
+        que los deltas incluyen los costos fijos. Los deltas y la capacidad se calculan con
+        arreglos sobre las cargas actuales.
+
+        Returns:
+            MoveBatch: Movimientos evaluados (delta inf si no es factible).
         """
-        neighbor = Solution(self.facilities, self.customers)
-        neighbor.customer_result = self.customer_result.copy()
-        neighbor.spare_capacity = self.spare_capacity.copy()
-        neighbor.facility_result = self.facility_result.copy()
+        problem = self.problem
+        demands, fixed_costs, costs = problem.demands, problem.fixed_costs, problem.costs
+        candidates = problem.candidates
+        num_customers, num_facilities = problem.num_customers, problem.num_facilities
+        assigned = self.customer_result
+        spare = self.spare_capacity
+        counts = self.facility_counts.copy()
+        opened = self.facility_result == 1
+        emptying = opened & (counts == 1)
+
+        # Reasignaciones: un cliente al azar hacia una de sus candidatas.
+        size = batch_size // 2
+        customers = np_random.integers(0, num_customers, size)
+        targets = candidates[customers, np_random.integers(0, candidates.shape[1], size)]
+        sources = assigned[customers]
+        deltas = (costs[customers, targets] - costs[customers, sources]
+                  + np.where(opened[targets], 0.0, fixed_costs[targets])
+                  - np.where(emptying[sources], fixed_costs[sources], 0.0))
+        deltas[(targets == sources) | (spare[targets] < demands[customers])] = np.inf
 
-        # Cambiar aleatoriamente 10-20 asignaciones de clientes.
-        for _ in range(random.randint(10, 20)):
-            random_customer = random.randint(0, len(self.customers) - 1)
-            current_facility = neighbor.customer_result[random_customer]
+        # Intercambios: un cliente al azar y otro de una de sus candidatas, tomado de los
+        # clientes ordenados por instalación.
+        order = np.argsort(assigned, kind="stable")
+        starts = np.cumsum(counts) - counts
+        size = batch_size - size
+        first = np_random.integers(0, num_customers, size)
+        first_facilities = assigned[first]
+        second_facilities = candidates[first, np_random.integers(0, candidates.shape[1], size)]
+        offsets = (np_random.random(size) * counts[second_facilities]).astype(np.int64)
+        second = order[np.minimum(starts[second_facilities] + offsets, num_customers - 1)]
+        with np.errstate(invalid="ignore"):  # Parejas inexistentes con costos dispersos: inf - inf.
+            swap_deltas = (costs[first, second_facilities] + costs[second, first_facilities]
+                           - costs[first, first_facilities] - costs[second, second_facilities])
+        swap_deltas[(counts[second_facilities] == 0) | (first_facilities == second_facilities)
+                    | (spare[second_facilities] + demands[second] < demands[first])
+                    | (spare[first_facilities] + demands[first] < demands[second])] = np.inf
+
+        # Cierres y aperturas, evaluados uno por uno (cada uno con arreglos).
+        structural_moves = []
+        used = np.flatnonzero(counts > 0)
+        for facility_id in np_random.choice(used, size=min(structural, len(used)), replace=False).tolist():
+            members = order[starts[facility_id]:starts[facility_id] + counts[facility_id]]
+            structural_moves.append(self._close_move(facility_id, members, opened))
+            # Intercambio: cerrar la misma instalación abriendo una candidata vacía de sus clientes.
+            closed_options = candidates[members].ravel()
+            closed_options = closed_options[counts[closed_options] == 0]
+            if len(closed_options):
+                opening = int(closed_options[np_random.integers(len(closed_options))])
+                structural_moves.append(self._close_move(facility_id, members, opened, opening))
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            current_costs = costs[np.arange(num_customers), assigned]
+            for facility_id in np_random.choice(empty, size=min(structural, len(empty)), replace=False).tolist():
+                structural_moves.append(self._open_move(facility_id, current_costs, counts, opened))
+        structural_moves = [move for move in structural_moves if move is not None]
+
+        return MoveBatch(
+            np.concatenate((deltas, swap_deltas, [delta for delta, _, _ in structural_moves])),
+            np.concatenate((customers, first)),
+            np.concatenate((np.full(len(customers), -1), second)),
+            np.concatenate((targets, second_facilities)),
+            np.concatenate((sources, first_facilities)),
+            opened, counts,
+            [(moves, facilities) for _, moves, facilities in structural_moves],
+        )
+
+    def _close_move(self, facility_id, members, opened, opening=None):
+        """
+        Cierre de una instalación: cada cliente pasa a su candidata abierta más barata con
+        espacio; con `opening`, esa instalación cerrada se abre para recibirlos (intercambio). Si alguno no tiene dónde ir o los que llegan a una misma instalación no caben
+        juntos, se reparten como en _PendingMoves.try_close, de mayor a menor demanda, entre
+        todas las instalaciones abiertas: cada uno a la más barata con espacio. No es factible
+        si aun así algún cliente no cabe.
 
-            # Seleccionar una nueva instalación.
-            new_facility = random.choice([
-                f_id for f_id in range(len(self.facilities))
-                if f_id != current_facility and self.customers[random_customer]['demand'] <= neighbor.spare_capacity[f_id]
-            ])
+        Returns:
+            tuple: Delta, movimientos e instalaciones afectadas, o None si no es factible.
+        """
+        problem = self.problem
+        costs = problem.costs
+        if opening is not None:
+            opened = opened.copy()
+            opened[opening] = True
+        demands = problem.demands[members]
+        options = problem.candidates[members]
+        allowed = opened[options] & (options != facility_id) & (self.spare_capacity[options] >= demands[:, None])
+        option_costs = np.where(allowed, costs[members[:, None], options], np.inf)
+        best = option_costs.argmin(axis=1)
+        rows = np.arange(len(members))
+        new_costs = option_costs[rows, best]
+        targets = options[rows, best]
+        if (not np.isfinite(new_costs).all()
+                or (np.bincount(targets, weights=demands, minlength=problem.num_facilities) > self.spare_capacity).any()):
+            others = np.flatnonzero(opened)
+            others = others[others != facility_id]
+            if len(others) == 0:
+                return None
+            other_costs = costs[members[:, None], others]
+            preferences = np.argsort(other_costs, axis=1).tolist()
+            spare = self.spare_capacity[others].tolist()
+            for row in np.argsort(-demands, kind="stable").tolist():
+                demand = demands[row]
+                column = next((column for column in preferences[row] if demand <= spare[column]), None)
+                if column is None or not np.isfinite(other_costs[row, column]):
+                    return None
+                spare[column] -= demand
+                targets[row] = others[column]
+                new_costs[row] = other_costs[row, column]
+        delta = float(new_costs.sum() - costs[members, facility_id].sum() - problem.fixed_costs[facility_id])
+        moves = [(MOVE_REASSIGN, customer_id, target) for customer_id, target in zip(members.tolist(), targets.tolist())]
+        moves.append((MOVE_CLOSE, facility_id))
+        if opening is not None and (targets == opening).any():
+            delta += float(problem.fixed_costs[opening])
+            moves.append((MOVE_OPEN, opening))
+        return delta, moves, {facility_id, *targets.tolist()}
 
-            if new_facility:
-                neighbor.spare_capacity[current_facility] += self.customers[random_customer]['demand']
-                neighbor.spare_capacity[new_facility] -= self.customers[random_customer]['demand']
-                neighbor.customer_result[random_customer] = new_facility
+    def _open_move(self, facility_id, current_costs, counts, opened):
+        """
+        Apertura de una instalación: recibe, mientras quepan, a los clientes que más ahorran
+        por unidad de demanda; las instalaciones que quedan vacías se cierran.
 
-        # Abrir o cerrar instalaciones aleatoriamente.
-        for _ in range(5):
-            random_facility = random.randint(0, len(self.facilities) - 1)
-            neighbor.facility_result[random_facility] ^= 1  # Alternar estado abierto/cerrado.
+        Returns:
+            tuple: Delta, movimientos e instalaciones afectadas, o None si nadie se mueve.
+        """
+        problem = self.problem
+        demands = problem.demands
+        gains = current_costs - problem.costs[:, [facility_id]][:, 0]
+        movers = np.flatnonzero(gains > 0)
+        movers = movers[np.argsort(-gains[movers] / np.maximum(demands[movers], 1e-9))]
+        movers = movers[np.cumsum(demands[movers]) <= problem.capacities[facility_id]]
+        if len(movers) == 0:
+            return None
+        sources = self.customer_result[movers]
+        emptied = np.flatnonzero(opened & (np.bincount(sources, minlength=problem.num_facilities) == counts))
+        delta = float((0.0 if opened[facility_id] else problem.fixed_costs[facility_id])
+                      - gains[movers].sum() - problem.fixed_costs[emptied].sum())
+        moves = [(MOVE_REASSIGN, customer_id, facility_id) for customer_id in movers.tolist()]
+        moves += [(MOVE_CLOSE, source) for source in emptied.tolist()]
+        moves.append((MOVE_OPEN, facility_id))
+        return delta, moves, {facility_id, *sources.tolist()}
 
-        neighbor.calculate_total_cost()
-        return neighbor
+    def apply_batch(self, batch, t):
+        """
+        Criterio de Metropolis sobre un lote: cada movimiento se acepta de forma
+        independiente y, en orden aleatorio, se aplican los aceptados que no tocan
+        instalaciones ya modificadas en este paso (sus deltas siguen siendo exactos).
 
+        Returns:
+            tuple: Movimientos aplicados y cambio total de costo.
+        """
+        deltas = batch.deltas
+        accepted = np.isfinite(deltas) & (
+            (deltas < 0) | (np_random.random(len(deltas)) < np.exp(-np.maximum(deltas, 0) / t))
+        )
+        touched = set()
+        applied, total = 0, 0.0
+        for index in np_random.permutation(np.flatnonzero(accepted)).tolist():
+            facilities = batch.facilities(index)
+            if not touched.isdisjoint(facilities):
+                continue
+            touched.update(facilities)
+            self.apply_moves(batch.moves(index))
+            applied += 1
+            total += deltas[index]
+        return applied, total
 
-    def local_search(self, max_customers=50):
+    def local_search(self, max_customers=50, accept_probability=0.0):
         """
         Mejora parcial de la solución considerando un subconjunto aleatorio de clientes.
+
+        Cada cliente solo mira sus instalaciones candidatas abiertas (problem.candidates) y
+        recurre a todas las abiertas si ninguna candidata tiene espacio. La elección de todos los
+        clientes del subconjunto se calcula de una vez; cada cambio se vuelve a validar contra la
+        capacidad libre al aplicarse. Las instalaciones que quedan sin clientes se cierran.
+
+        Args:
+            max_customers (int): Clientes considerados.
+            accept_probability (float): Probabilidad de aceptar una candidata más cara (ver
+                _pick_facilities); con 0 solo hay mejoras.
+
+        Returns:
+            list: Registro para deshacer los cambios con rollback().
         """
-        customers_to_consider = random.sample(
-            range(len(self.customer_result)),
-            min(max_customers, len(self.customer_result))
+        self._own()
+        undo = []
+        demands = self.problem.demands
+        all_costs = self.problem.costs
+        customers_to_consider = np_random.choice(
+            len(self.customer_result), size=min(max_customers, len(self.customer_result)), replace=False
         )
-        for customer_id in customers_to_consider:
-            current_facility = self.customer_result[customer_id]
-            best_facility = current_facility
-            best_cost = self.customers[customer_id]['costs'][current_facility]
-
-            for facility_id in range(len(self.facilities)):
-                if (facility_id != current_facility and
-                    self.customers[customer_id]['demand'] <= self.spare_capacity[facility_id]):
-                    new_cost = self.customers[customer_id]['costs'][facility_id]
-                    if new_cost < best_cost or random.random() < 0.2:
-                        best_facility = facility_id
-                        best_cost = new_cost
-
-            if best_facility != current_facility:
-                self.spare_capacity[current_facility] += self.customers[customer_id]['demand']
-                self.spare_capacity[best_facility] -= self.customers[customer_id]['demand']
-                self.customer_result[customer_id] = best_facility
-
-        
+        rows = np.arange(len(customers_to_consider))
+        current = self.customer_result[customers_to_consider]
+        current_costs = all_costs[customers_to_consider, current]
+        customer_demands = demands[customers_to_consider]
+
+        candidates = self.problem.candidates[customers_to_consider]
+        opened = self.facility_result == 1
+        feasible = ((self.spare_capacity[candidates] >= customer_demands[:, None]) & (candidates != current[:, None])
+                    & opened[candidates])
+        positions = _pick_facilities(all_costs[customers_to_consider[:, None], candidates], feasible, current_costs,
+                                     accept_probability)
+        best = np.where(positions >= 0, candidates[rows, np.maximum(positions, 0)], current)
+
+        # Clientes sin candidatas con espacio: usar todas las instalaciones.
+        without_candidates = ~feasible.any(axis=1)
+        if without_candidates.any():
+            subset = customers_to_consider[without_candidates]
+            subset_costs = all_costs[subset]
+            feasible = ((self.spare_capacity[None, :] >= customer_demands[without_candidates][:, None])
+                        & np.isfinite(subset_costs) & opened[None, :])
+            feasible[np.arange(len(subset)), current[without_candidates]] = False
+            positions = _pick_facilities(subset_costs, feasible, current_costs[without_candidates], accept_probability)
+            best[without_candidates] = np.where(positions >= 0, positions, current[without_candidates])
+
+        # Validar secuencialmente la capacidad y aplicar los cambios aceptados en bloque.
+        spare = self.spare_capacity.tolist()
+        moved_customers, moved_to, moved_from = [], [], []
+        for customer_id, facility_id, current_facility, demand in zip(
+            customers_to_consider.tolist(), best.tolist(), current.tolist(),
+            customer_demands.tolist()
+        ):
+            if facility_id != current_facility and demand <= spare[facility_id]:
+                spare[facility_id] -= demand
+                spare[current_facility] += demand
+                moved_customers.append(customer_id)
+                moved_to.append(facility_id)
+                moved_from.append(current_facility)
+                undo.append((MOVE_REASSIGN, customer_id, current_facility))
+
+        if moved_customers:
+            self.spare_capacity[:] = spare
+            self.customer_result[moved_customers] = moved_to
+            self._move_customers(moved_customers, moved_from, moved_to)
+            self.total_cost += float(
+                all_costs[moved_customers, moved_to].sum() - all_costs[moved_customers, moved_from].sum()
+            )
+            # Las instalaciones que quedaron sin clientes se cierran.
+            sources = np.unique(moved_from)
+            emptied = sources[self.facility_counts[sources] == 0]
+            for facility_id in emptied.tolist():
+                undo.append(self.apply_move((MOVE_CLOSE, facility_id)))
+
+        return undo
 
     def __lt__(self, other):
         """
@@ -172,10 +926,45 @@ class Solution:
         """
         return self.total_cost < other.total_cost
 
+    def certified_gap(self):
+        """
+        Brecha certificada en porcentaje contra la cota inferior lagrangiana de la instancia
+        (se calcula la primera vez que se pide, ver CFLP.lower_bound).
+        """
+        return gap_percent(self.total_cost, self.problem.lower_bound(self.total_cost))
+
     def print_solution(self):
         """
         Imprime los detalles de la solución.
         """
         print(f"Total Cost: {self.total_cost}")
-        print(f"Facility Open Status: {self.facility_result}")
-        print(f"Customer Assignments: {self.customer_result}")
+        if self.problem.bound is not None:
+            print(f"Certified Gap: {gap_percent(self.total_cost, self.problem.bound):.4f}%")
+        print(f"Facility Open Status: {self.facility_result.tolist()}")
+        print(f"Customer Assignments: {self.customer_result.tolist()}")
+
+
+class SolutionSnapshot:
+    __slots__ = ("customer_result", "facility_result", "total_cost")
+
+    def __init__(self, solution):
+        """
+        Copia las asignaciones (int32), los estados (int8) y el costo de una solución.
+        """
+        self.customer_result = solution.customer_result.astype(np.int32)
+        self.facility_result = solution.facility_result.astype(np.int8)
+        self.total_cost = solution.total_cost
+
+    def update(self, solution):
+        """
+        Sobrescribe la copia con otra solución sin reservar memoria nueva.
+        """
+        np.copyto(self.customer_result, solution.customer_result)
+        np.copyto(self.facility_result, solution.facility_result)
+        self.total_cost = solution.total_cost
+
+    def restore(self, problem):
+        """
+        Reconstruye una Solution completa (con capacidades libres) a partir de la copia.
+        """
+        return Solution.from_assignment(problem, self.customer_result, self.facility_result)
@@ -0,0 +1,132 @@
+import numpy as np  # Listas de instalaciones cercanas y sus costos.
+
+
+def require_dense(costs, feature):
+    """
+    Lanza ValueError si costs es una SparseCosts: `feature` necesita la matriz completa y
+    convertirla a densa gastaría la memoria que nearest busca ahorrar.
+    """
+    if isinstance(costs, SparseCosts):
+        raise ValueError(f"{feature} necesita la matriz de costos completa; cargue la instancia sin nearest.")
+
+
+class SparseCosts:
+    """
+    Matriz de costos que guarda solo las k instalaciones más baratas de cada cliente.
+
+    Las demás asignaciones quedan prohibidas (costo infinito). Admite los accesos que usa
+    el recocido en modo "customers": costs[c, f] escalar, costs[filas, columnas] con
+    arreglos (con broadcasting), costs[c] y costs[filas] como filas densas, costs[:, columnas]
+    y min/argmin por cliente. Cualquier otra operación convierte la matriz a densa (ver
+    toarray), lo que solo es razonable en instancias pequeñas.
+    """
+
+    def __init__(self, ids, values, num_facilities):
+        """
+        Args:
+            ids (array): Instalaciones de cada cliente ordenadas por costo (clientes x k).
+            values (array): Costo de cada una de esas asignaciones (clientes x k).
+            num_facilities (int): Número total de instalaciones.
+        """
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.num_facilities = num_facilities
+
+    @classmethod
+    def from_dense(cls, costs, k):
+        """
+        Conserva las k instalaciones más baratas de cada fila de una matriz densa.
+        """
+        costs = np.asarray(costs)
+        k = max(1, min(k, costs.shape[1]))
+        if k < costs.shape[1]:
+            nearest = np.argpartition(costs, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(k), costs.shape)
+        values = np.take_along_axis(costs, nearest, axis=1)
+        order = values.argsort(axis=1)
+        return cls(np.take_along_axis(nearest, order, axis=1), np.take_along_axis(values, order, axis=1),
+                   costs.shape[1])
+
+    @property
+    def shape(self):
+        return (len(self.ids), self.num_facilities)
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.values.nbytes
+
+    def nearest(self, k):
+        """
+        Las k instalaciones más baratas de cada cliente (lista de candidatas).
+        """
+        return self.ids[:, :k]
+
+    def lookup(self, rows, columns):
+        """
+        Costos de los pares (fila, columna) con broadcasting; infinito si el par no se guardó.
+        """
+        rows, columns = np.broadcast_arrays(np.asarray(rows), np.asarray(columns))
+        hits = self.ids[rows] == columns[..., None]
+        found = hits.any(axis=-1)
+        values = np.take_along_axis(self.values[rows], hits.argmax(axis=-1)[..., None], axis=-1)[..., 0]
+        return np.where(found, values, np.inf)
+
+    def rows(self, rows, columns=None):
+        """
+        Filas densas (clientes x columnas) con infinito en los pares no guardados.
+        """
+        rows = np.asarray(rows)
+        if columns is None:
+            columns = np.arange(self.num_facilities)
+        position = np.full(self.num_facilities, -1)
+        position[columns] = np.arange(len(columns))
+        ids = self.ids[rows]
+        mapped = position[ids]
+        kept = mapped >= 0
+        dense = np.full((len(rows), len(columns)), np.inf)
+        dense[np.nonzero(kept)[0], mapped[kept]] = self.values[rows][kept]
+        return dense
+
+    def toarray(self):
+        """
+        Matriz densa equivalente, con infinito en las asignaciones no guardadas.
+        """
+        return self.rows(np.arange(len(self.ids)))
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.toarray()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2:
+            rows, columns = key
+            if isinstance(rows, slice) and rows == slice(None) and not isinstance(columns, slice):
+                return self.rows(np.arange(len(self.ids)), np.atleast_1d(columns))
+            if isinstance(rows, (int, np.integer)) and isinstance(columns, (int, np.integer)):
+                hits = self.ids[rows] == columns
+                position = hits.argmax()
+                return float(self.values[rows, position]) if hits[position] else np.inf
+            if not isinstance(rows, slice) and not isinstance(columns, slice):
+                result = self.lookup(rows, columns)
+                return float(result) if result.ndim == 0 else result
+            return self.toarray()[key]
+        if isinstance(key, (int, np.integer)):
+            return self.rows([key])[0]
+        if not isinstance(key, slice):
+            return self.rows(key)
+        return self.toarray()[key]
+
+    def min(self, axis=None):
+        if axis == 1:
+            return self.values[:, 0].copy()
+        return np.asarray(self).min(axis=axis)
+
+    def argmin(self, axis=None):
+        if axis == 1:
+            return self.ids[:, 0].astype(np.int64)
+        return np.asarray(self).argmin(axis=axis)
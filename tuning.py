@@ -0,0 +1,245 @@
+import math  # Costos no válidos.
+import random  # Orden de los bloques de la carrera.
+import argparse  # Línea de comandos.
+import itertools  # Combinaciones de parámetros.
+from statistics import NormalDist  # Aproximaciones normales de las pruebas.
+from concurrent.futures import ProcessPoolExecutor
+from benchmark import parse_instance_spec, run_case
+from profiles import PROFILE_PATH, instance_family, save_profile
+
+# Tolerancia relativa para considerar iguales dos costos; el empate se decide con tie_breaker.
+COST_TOLERANCE = 1e-6
+
+
+def configurations(grid):
+    """
+    Combinaciones de una grilla de parámetros.
+
+    Args:
+        grid (dict): Valores posibles de cada parámetro, por ejemplo {"temperature": [100, 1000]}.
+
+    Returns:
+        list: Diccionarios de parámetros, uno por combinación.
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def tie_breaker(base_params):
+    """
+    Criterio de desempate entre costos iguales según el presupuesto de las ejecuciones.
+    Sin presupuesto gana la que usó menos evaluaciones (a diferencia del tiempo, no
+    depende de la carga de la máquina); con --max-evaluaciones todas usan las mismas, así
+    que decide el tiempo; con --tiempo-limite las evaluaciones solo miden el rendimiento
+    de cada configuración y el tiempo es el mismo, así que no se desempata.
+
+    Args:
+        base_params (dict): Parámetros comunes a todas las configuraciones.
+
+    Returns:
+        int: Posición del criterio en (costo, evaluaciones, tiempo), o None si no se desempata.
+    """
+    base_params = base_params or {}
+    if base_params.get("time_limit") is not None:
+        return None
+    if base_params.get("max_evaluations") is not None:
+        return 2
+    return 1
+
+
+def block_ranks(results):
+    """
+    Rangos de las configuraciones en un bloque (instancia y semilla): menor costo primero
+    y, con costos iguales, menor valor del criterio de desempate (ver tie_breaker). Los
+    empates completos reciben el rango promedio.
+
+    Args:
+        results (list): Pares (costo, desempate) de cada configuración; el desempate
+            puede ser 0 en todas para no desempatar.
+
+    Returns:
+        list: Rango de cada configuración (1 es la mejor).
+    """
+    best = min(cost for cost, _ in results)
+    scale = max(abs(best), 1.0)
+    keys = [(round((cost - best) / scale / COST_TOLERANCE) if math.isfinite(cost) else math.inf, tie)
+            for cost, tie in results]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    ranks = [0.0] * len(keys)
+    position = 0
+    while position < len(order):
+        end = position
+        while end + 1 < len(order) and keys[order[end + 1]] == keys[order[position]]:
+            end += 1
+        for index in order[position:end + 1]:
+            ranks[index] = (position + end) / 2 + 1
+        position = end + 1
+    return ranks
+
+
+def friedman_test(ranks):
+    """
+    Prueba de Friedman sobre los rangos de cada bloque, con la aproximación normal de
+    Wilson-Hilferty para la distribución chi cuadrado.
+
+    Args:
+        ranks (list): Rangos de las configuraciones en cada bloque (bloques x configuraciones).
+
+    Returns:
+        tuple: Suma de rangos de cada configuración y valor p de la hipótesis de que todas son iguales.
+    """
+    blocks, k = len(ranks), len(ranks[0])
+    rank_sums = [sum(block[j] for block in ranks) for j in range(k)]
+    statistic = 12 / (blocks * k * (k + 1)) * sum(r * r for r in rank_sums) - 3 * blocks * (k + 1)
+    df = k - 1
+    if statistic <= 0:
+        return rank_sums, 1.0
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return rank_sums, 1 - NormalDist().cdf(z)
+
+
+def eliminate(ranks, alpha=0.05):
+    """
+    Configuraciones que siguen en carrera: si la prueba de Friedman rechaza que todas son
+    iguales, se descartan las que tienen una suma de rangos mayor que la mejor por más que
+    la diferencia crítica de la aproximación normal.
+
+    Returns:
+        list: Índices (en ranks) de las configuraciones que siguen.
+    """
+    rank_sums, p_value = friedman_test(ranks)
+    k = len(rank_sums)
+    if p_value >= alpha:
+        return list(range(k))
+    blocks = len(ranks)
+    critical = NormalDist().inv_cdf(1 - alpha) * math.sqrt(blocks * k * (k + 1) / 6)
+    best = min(rank_sums)
+    return [j for j in range(k) if rank_sums[j] - best <= critical]
+
+
+def race(tasks, candidates, seeds, base_params=None, processes=None, min_blocks=4, alpha=0.05, max_blocks=None,
+         shuffle_seed=0):
+    """
+    Carrera de configuraciones (F-Race): cada bloque es una instancia con una semilla y
+    todas las configuraciones que siguen en carrera lo resuelven en paralelo. Desde el
+    bloque min_blocks se descartan las que son claramente peores (ver eliminate).
+
+    Args:
+        tasks (list): Pares (archivo, índice de capacidad).
+        candidates (list): Configuraciones (diccionarios de parámetros de simulated_annealing).
+        seeds (list): Semillas de cada instancia.
+        base_params (dict): Parámetros comunes a todas las configuraciones (por ejemplo, el presupuesto).
+        processes (int): Procesos de trabajo.
+        min_blocks (int): Bloques antes de la primera prueba.
+        alpha (float): Nivel de significancia.
+        max_blocks (int): Bloques máximos (por defecto, todas las combinaciones de tarea y semilla).
+        shuffle_seed (int): Semilla del orden de los bloques.
+
+    Returns:
+        dict: Configuración ganadora ("params"), configuraciones sobrevivientes, bloques
+            usados, rango promedio de cada sobreviviente y costo y tiempo medios de la ganadora.
+    """
+    blocks = [(path, capacity_index, seed) for path, capacity_index in tasks for seed in seeds]
+    random.Random(shuffle_seed).shuffle(blocks)
+    if max_blocks is not None:
+        blocks = blocks[:max_blocks]
+    alive = list(range(len(candidates)))
+    tie = tie_breaker(base_params)
+
+    def scores(record):
+        return record[0], record[tie] if tie is not None else 0
+
+    history = {j: [] for j in alive}  # Configuración -> (costo, evaluaciones, tiempo) por bloque.
+    ranks = []                        # Rangos por bloque de las configuraciones vivas.
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for number, (path, capacity_index, seed) in enumerate(blocks, start=1):
+            futures = {
+                j: executor.submit(run_case, (path, capacity_index, seed, str(j), {**(base_params or {}), **candidates[j]}))
+                for j in alive
+            }
+            for j, future in futures.items():
+                record = future.result()
+                cost = record["cost"] if record["valid"] else math.inf
+                history[j].append((cost, record["evaluations"], record["time"]))
+            ranks = [block_ranks([scores(history[j][b]) for j in alive]) for b in range(number)]
+
+            if number >= min_blocks and len(alive) > 1:
+                survivors = eliminate(ranks, alpha)
+                if len(survivors) < len(alive):
+                    alive = [alive[j] for j in survivors]
+                    # Los rangos se recalculan entre las que siguen.
+                    ranks = [block_ranks([scores(history[j][b]) for j in alive]) for b in range(number)]
+            print(f"[{number}/{len(blocks)}] {path}:{capacity_index} s={seed}: {len(alive)} configuraciones en carrera")
+            if len(alive) == 1:
+                break
+
+    mean_ranks = [sum(block[j] for block in ranks) / len(ranks) for j in range(len(alive))]
+    winner = alive[min(range(len(alive)), key=mean_ranks.__getitem__)]
+    costs = [cost for cost, _, _ in history[winner]]
+    return {
+        "params": candidates[winner],
+        "survivors": [candidates[j] for j in alive],
+        "mean_ranks": mean_ranks,
+        "blocks": len(ranks),
+        "mean_cost": sum(costs) / len(costs),
+        "mean_time": sum(time for _, _, time in history[winner]) / len(history[winner]),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ajustar los parámetros del recocido por familia de instancias con una carrera.")
+    parser.add_argument("instances", nargs="+", help="Instancias (cap61, capb, capc:0, rutas); se agrupan por familia.")
+    parser.add_argument("--carpeta", default="./instances", help="Carpeta con las instancias.")
+    parser.add_argument("--semillas", type=int, nargs="+", default=[1, 2, 3], help="Semillas de cada instancia.")
+    parser.add_argument("--temperaturas", type=float, nargs="+", default=[100, 1000])
+    parser.add_argument("--enfriamientos", type=float, nargs="+", default=[0.999, 0.9995],
+                        help="Tasas de enfriamiento; se ignoran con --tiempo-limite o --max-evaluaciones.")
+    parser.add_argument("--iteraciones", type=int, nargs="+", default=[5, 10],
+                        help="Iteraciones por temperatura; se ignoran con --tiempo-limite o --max-evaluaciones.")
+    parser.add_argument("--busqueda-local", type=int, nargs="+", default=[50, 100],
+                        help="Clientes revisados por la búsqueda local de cada paso.")
+    parser.add_argument("--busqueda", choices=["customers", "facilities", "batch"], default="customers",
+                        help="Modo de búsqueda de simulated_annealing.")
+    parser.add_argument("--tiempo-limite", type=float, default=None, help="Segundos máximos por ejecución.")
+    parser.add_argument("--max-evaluaciones", type=int, default=None, help="Vecinos máximos por ejecución.")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos de trabajo (por defecto uno por núcleo, o uno solo con --tiempo-limite).")
+    parser.add_argument("--bloques-minimos", type=int, default=4, help="Bloques antes de la primera prueba.")
+    parser.add_argument("--alfa", type=float, default=0.05, help="Nivel de significancia de las pruebas.")
+    parser.add_argument("--perfiles", default=PROFILE_PATH, help="Archivo donde guardar los perfiles.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    grid = {
+        "temperature": args.temperaturas,
+        "cooling_rate": args.enfriamientos,
+        "iterations": args.iteraciones,
+        "local_search_size": args.busqueda_local,
+    }
+    base_params = {"search": args.busqueda, "time_limit": args.tiempo_limite, "max_evaluations": args.max_evaluaciones}
+    if args.tiempo_limite is not None or args.max_evaluaciones is not None:
+        # Con presupuesto la temperatura baja según el avance: cooling_rate no se usa y las
+        # iteraciones por temperatura no cambian cuánto se enfría.
+        del grid["cooling_rate"]
+        del grid["iterations"]
+    processes = args.procesos
+    if processes is None and args.tiempo_limite is not None:
+        # Con límite de tiempo, las ejecuciones simultáneas se quitarían tiempo de CPU entre sí.
+        processes = 1
+    families = {}
+    for spec in args.instances:
+        for path, capacity_index in parse_instance_spec(spec, args.carpeta):
+            families.setdefault(instance_family(path), []).append((path, capacity_index))
+
+    for family, tasks in families.items():
+        print(f"Familia {family}: {len(tasks)} instancias, {len(configurations(grid))} configuraciones")
+        result = race(tasks, configurations(grid), args.semillas, base_params, processes,
+                      args.bloques_minimos, args.alfa)
+        save_profile(family, result["params"], args.perfiles, search=args.busqueda, time_limit=args.tiempo_limite,
+                     max_evaluations=args.max_evaluaciones, blocks=result["blocks"],
+                     survivors=len(result["survivors"]), mean_cost=result["mean_cost"], mean_time=result["mean_time"])
+        print(f"Perfil de {family}: {result['params']} (costo medio {result['mean_cost']:.3f}, "
+              f"tiempo medio {result['mean_time']:.2f}s) guardado en '{args.perfiles}'.")
@@ -0,0 +1,116 @@
+import numpy as np  # Copias de los vectores y la matriz de costos.
+from cflp import CFLP
+from solution import Solution
+from assignment import repair_assignment, improve_assignment
+from sparse_costs import require_dense
+
+# Tolerancia para comparar capacidades.
+EPSILON = 1e-9
+
+
+def apply_delta(problem, delta):
+    """
+    Crea una instancia nueva con los cambios indicados, sin modificar la original.
+
+    Formato del cambio (todas las claves son opcionales):
+        {"demands": {cliente: demanda}, "capacities": {instalación: capacidad},
+         "fixed_costs": {instalación: costo}, "costs": {cliente: fila de costos o
+         (cliente, instalación): costo}}
+
+    Returns:
+        tuple: Instancia nueva, clientes afectados (cambió su demanda o sus costos) e
+            instalaciones afectadas (cambió su capacidad o su costo fijo).
+    """
+    require_dense(problem.costs, "La reoptimización")
+    capacities = np.array(problem.capacities, dtype=np.float64)
+    fixed_costs = np.array(problem.fixed_costs, dtype=np.float64)
+    demands = np.array(problem.demands, dtype=np.float64)
+    costs = np.array(problem.costs, dtype=np.float64)
+    customers, facilities = set(), set()
+
+    for customer_id, demand in delta.get("demands", {}).items():
+        demands[customer_id] = demand
+        customers.add(customer_id)
+    for facility_id, capacity in delta.get("capacities", {}).items():
+        capacities[facility_id] = capacity
+        facilities.add(facility_id)
+    for facility_id, cost in delta.get("fixed_costs", {}).items():
+        fixed_costs[facility_id] = cost
+        facilities.add(facility_id)
+    for key, value in delta.get("costs", {}).items():
+        costs[key] = value  # Fila completa de un cliente o un elemento (cliente, instalación).
+        customers.add(key[0] if isinstance(key, tuple) else key)
+
+    new_problem = CFLP.from_arrays(capacities, fixed_costs, demands, costs, problem.candidate_size)
+    return new_problem, sorted(customers), sorted(facilities)
+
+
+def repair_solution(problem, previous, customers):
+    """
+    Adapta una solución anterior a la instancia modificada tocando lo mínimo: los
+    clientes afectados eligen la instalación abierta más barata con espacio y luego se
+    corrigen las sobrecargas, primero entre las instalaciones abiertas y, si no alcanza,
+    abriendo otras.
+
+    Args:
+        problem (CFLP): Instancia modificada.
+        previous (Solution): Solución de la instancia original.
+        customers (list): Clientes afectados por el cambio.
+
+    Returns:
+        Solution: Solución factible para la instancia modificada.
+    """
+    customer_result = previous.customer_result.astype(np.int64)
+    open_mask = np.bincount(customer_result, minlength=problem.num_facilities) > 0
+    demands = problem.demands
+
+    # Los clientes afectados salen y vuelven a entrar en la instalación abierta más barata con espacio.
+    spare = problem.capacities - np.bincount(customer_result, weights=demands, minlength=problem.num_facilities)
+    for customer_id in customers:
+        spare[customer_result[customer_id]] += demands[customer_id]
+        fits = open_mask & (spare >= demands[customer_id] - EPSILON)
+        options = np.flatnonzero(fits) if fits.any() else np.flatnonzero(open_mask)
+        facility_id = int(options[problem.costs[customer_id, options].argmin()])
+        customer_result[customer_id] = facility_id
+        spare[facility_id] -= demands[customer_id]
+
+    if not repair_assignment(problem, customer_result, open_mask):
+        # Las instalaciones abiertas ya no alcanzan: se permite mover clientes a cualquiera.
+        open_mask = np.ones(problem.num_facilities, dtype=bool)
+        if not repair_assignment(problem, customer_result, open_mask):
+            raise ValueError("La capacidad total de las instalaciones no alcanza para la demanda.")
+        open_mask = np.bincount(customer_result, minlength=problem.num_facilities) > 0
+    improve_assignment(problem, customer_result, open_mask)
+    return Solution.from_assignment(problem, customer_result)
+
+
+def reoptimize(problem, previous, delta, temperature=10, accept_temperature=0.01, max_evaluations=2000,
+               search="customers", **kwargs):
+    """
+    Vuelve a resolver una instancia tras un cambio pequeño partiendo de la solución anterior:
+    se aplica el cambio, se repara la solución y se corre un recocido corto a baja temperatura.
+
+    Args:
+        problem (CFLP): Instancia original.
+        previous (Solution): Solución de la instancia original.
+        delta (dict): Cambios de la instancia (ver apply_delta).
+        temperature (float): Temperatura inicial del recocido corto.
+        accept_temperature (float): Temperatura final.
+        max_evaluations (int): Vecinos evaluados por el recocido corto.
+        search (str): Modo de búsqueda del recocido corto. "customers" mueve pocos clientes
+            por paso y conserva el plan anterior; "facilities" reconstruye toda la asignación
+            en cada paso y puede cambiar la instalación de muchos clientes.
+        **kwargs: Otros argumentos de simulated_annealing.
+
+    Returns:
+        tuple: Instancia modificada y su mejor solución. En new_problem.run_stats se agrega
+            "changed_customers", el número de clientes cuya instalación cambió respecto del plan anterior.
+    """
+    new_problem, customers, _ = apply_delta(problem, delta)
+    start = repair_solution(new_problem, previous, customers)
+    solution = new_problem.simulated_annealing(
+        temperature=temperature, accept_temperature=accept_temperature, max_evaluations=max_evaluations,
+        search=search, initial=start, **kwargs
+    )
+    new_problem.run_stats["changed_customers"] = int((solution.customer_result != previous.customer_result).sum())
+    return new_problem, solution